@@ -0,0 +1,9 @@
+import pytest
+from django.test import override_settings
+
+
+@pytest.fixture(scope='session', autouse=True)
+def media_root(tmp_path_factory):
+    """Uploads and thumbnails of the test run, outside the source tree."""
+    with override_settings(MEDIA_ROOT=str(tmp_path_factory.mktemp('media'))):
+        yield
@@ -0,0 +1,22 @@
+import pytest
+
+from posts.tests.mixins import count_queries, format_queries, seed_feed
+
+
+@pytest.fixture
+def big_feed(db):
+    """Authors and groups of a feed with many authors and groups."""
+    return seed_feed()
+
+
+@pytest.fixture
+def assert_query_budget(client):
+    """Check a cold request against a query budget, listing its SQL."""
+    def check(budget, path, method='get', data=None, client=client):
+        response, queries = count_queries(client, path, method, data)
+        assert len(queries) <= budget, (
+            f'Страница `{path}` выполняет {len(queries)} запросов к базе '
+            f'при бюджете {budget}:\n{format_queries(queries)}'
+        )
+        return response
+    return check
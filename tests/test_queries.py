@@ -0,0 +1,33 @@
+import pytest
+
+from posts.models import Post
+
+
+class TestQueryBudget:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_feeds_query_budget(self, client, big_feed, assert_query_budget):
+        authors, groups = big_feed
+        post = Post.objects.filter(author=authors[0]).first()
+        budgets = {
+            '/': 3,
+            f'/group/{groups[0].slug}/': 2,
+            f'/profile/{authors[0].username}/': 3,
+            f'/posts/{post.pk}/': 5,
+        }
+        for path, budget in budgets.items():
+            response = assert_query_budget(budget, path)
+            assert response.status_code == 200, (
+                f'Страница `{path}` работает неправильно'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_forms_query_budget(self, client, big_feed, assert_query_budget):
+        authors, groups = big_feed
+        post = Post.objects.filter(author=authors[0]).first()
+        client.force_login(authors[0])
+        for path, budget in (('/create/', 3), (f'/posts/{post.pk}/edit/', 4)):
+            response = assert_query_budget(budget, path)
+            assert response.status_code == 200, (
+                f'Страница `{path}` работает неправильно'
+            )
@@ -0,0 +1,78 @@
+"""Read replica routing with read-your-writes stickiness.
+
+Safe requests to the views named in READ_REPLICA_VIEWS read from a random
+alias of DATABASE_REPLICAS; everything else, and every write, uses the
+primary. A write request pins its session to the primary for
+READ_YOUR_WRITES_WINDOW seconds, so authors see their own posts before the
+replicas catch up. Locally the replicas are SQLite files refreshed with
+manage.py sync_replicas.
+"""
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+STICKY_SESSION_KEY = 'read_primary_until'
+SAFE_METHODS = ('GET', 'HEAD')
+
+_state = threading.local()
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def reading_replica():
+    """Whether the current request reads from a replica."""
+    return getattr(_state, 'alias', None) is not None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return getattr(_state, 'alias', None)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold copies of the primary rows.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Pick the database the views of a request read from.
+
+    Must come after SessionMiddleware, which saves the stickiness mark.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.alias = None
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            request.session[STICKY_SESSION_KEY] = (
+                time.time() + settings.READ_YOUR_WRITES_WINDOW
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        replicas = replica_aliases()
+        if (not replicas or request.method not in SAFE_METHODS
+                or request.resolver_match.view_name
+                not in settings.READ_REPLICA_VIEWS):
+            return None
+        if request.session.get(STICKY_SESSION_KEY, 0) > time.time():
+            return None
+        _state.alias = random.choice(replicas)
+        return None
@@ -0,0 +1,34 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.db_router import replica_aliases
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в файлы реплик из '
+            'DATABASE_REPLICAS, чтобы проверять маршрутизацию локально.')
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS].settings_dict
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('sync_replicas поддерживает только SQLite.')
+        aliases = replica_aliases()
+        if not aliases:
+            raise CommandError('Реплики не настроены.')
+        source = sqlite3.connect(primary['NAME'])
+        try:
+            for alias in aliases:
+                connections[alias].close()
+                name = connections[alias].settings_dict['NAME']
+                target = sqlite3.connect(name)
+                try:
+                    # The backup API copies a consistent snapshot even while
+                    # the primary is being written to.
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'{alias}: скопировано.')
+        finally:
+            source.close()
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.warmup import warm_templates
+
+
+class Command(BaseCommand):
+    help = ('Компилирует все шаблоны из templates/ и падает на шаблонах '
+            'с синтаксическими ошибками.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        compiled, errors = warm_templates()
+        elapsed = (time.perf_counter() - started) * 1000
+        for name, error in errors.items():
+            self.stderr.write(f'{name}: {error}')
+        if errors:
+            raise CommandError(
+                'Шаблоны с ошибками: ' + ', '.join(errors)
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Скомпилировано шаблонов: {len(compiled)} за {elapsed:.0f} мс.'
+        ))
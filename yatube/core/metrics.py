@@ -0,0 +1,299 @@
+"""Per-view request metrics in the Prometheus text format.
+
+MetricsMiddleware measures every resolved request: latency into a
+histogram, the number and time of SQL queries, the time spent rendering
+templates and the response size, all labelled by the view name. Counters
+are plain floats in a dict of the process, so a request costs a few
+perf_counter() calls and dict additions under one lock.
+
+With METRICS_DIR set, each process writes its counters to <pid>.json in
+that directory at most every METRICS_FLUSH_INTERVAL seconds, and /metrics
+sums the files of all processes. Files of exited workers are kept, so
+counters do not go backwards; clear the directory when deploying.
+"""
+import glob
+import hmac
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template.backends.django import (
+    DjangoTemplates as BaseDjangoTemplates, Template as BaseTemplate,
+    reraise,
+)
+from django.template.exceptions import TemplateDoesNotExist
+from django.utils.module_loading import import_string
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKET_LABELS = [str(bucket) for bucket in BUCKETS] + ['+Inf']
+UNRESOLVED = 'unresolved'
+
+# name, type and help of each metric, keyed by the name of its counters.
+METRICS = {
+    'request_duration': (
+        'yatube_request_duration_seconds', 'histogram',
+        'Time to build the response, by view.'
+    ),
+    'responses': (
+        'yatube_responses_total', 'counter',
+        'Responses by view and status code.'
+    ),
+    'db_queries': (
+        'yatube_db_queries_total', 'counter',
+        'SQL queries run while handling requests, by view.'
+    ),
+    'db_seconds': (
+        'yatube_db_query_seconds_total', 'counter',
+        'Time spent in SQL queries, by view.'
+    ),
+    'template_seconds': (
+        'yatube_template_render_seconds_total', 'counter',
+        'Time spent rendering templates, by view.'
+    ),
+    'response_bytes': (
+        'yatube_response_bytes_total', 'counter',
+        'Size of response bodies, by view.'
+    ),
+}
+
+_local = threading.local()
+
+
+class Sample:
+    """What one request spent on queries and templates."""
+
+    __slots__ = ('queries', 'db_seconds', 'template_seconds', 'rendering')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.rendering = False
+
+    def time_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - started
+
+
+class Registry:
+    """Counters of this process, keyed by 'metric<TAB>view<TAB>label'."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.counters = defaultdict(float)
+        self.flushed = time.monotonic()
+
+    def observe(self, view, status, duration, sample, size):
+        bucket = BUCKET_LABELS[bisect_left(BUCKETS, duration)]
+        with self.lock:
+            if self.pid != os.getpid():
+                # Forked from a process that already counted requests.
+                self.reset()
+            counters = self.counters
+            counters[f'request_duration\t{view}\t{bucket}'] += 1
+            counters[f'request_duration_sum\t{view}\t'] += duration
+            counters[f'responses\t{view}\t{status}'] += 1
+            counters[f'db_queries\t{view}\t'] += sample.queries
+            counters[f'db_seconds\t{view}\t'] += sample.db_seconds
+            counters[f'template_seconds\t{view}\t'] += (
+                sample.template_seconds
+            )
+            counters[f'response_bytes\t{view}\t'] += size
+        if time.monotonic() - self.flushed >= getattr(
+                settings, 'METRICS_FLUSH_INTERVAL', 1):
+            self.flush()
+
+    def flush(self):
+        """Write the counters of this process for other processes to read."""
+        directory = getattr(settings, 'METRICS_DIR', None)
+        self.flushed = time.monotonic()
+        if not directory:
+            return
+        with self.lock:
+            counters = dict(self.counters)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump(counters, file)
+        os.replace(f'{path}.tmp', path)
+
+    def collect(self):
+        """Counters summed over every process that wrote METRICS_DIR."""
+        directory = getattr(settings, 'METRICS_DIR', None)
+        if not directory:
+            with self.lock:
+                return dict(self.counters)
+        self.flush()
+        totals = defaultdict(float)
+        for path in glob.glob(os.path.join(directory, '*.json')):
+            try:
+                with open(path) as file:
+                    counters = json.load(file)
+            except (OSError, ValueError):
+                continue
+            for key, value in counters.items():
+                totals[key] += value
+        return totals
+
+
+registry = Registry()
+
+
+class Template(BaseTemplate):
+    def render(self, context=None, request=None):
+        sample = getattr(_local, 'sample', None)
+        if sample is None or sample.rendering:
+            return super().render(context, request)
+        sample.rendering = True
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            sample.template_seconds += time.perf_counter() - started
+            sample.rendering = False
+
+
+class DjangoTemplates(BaseDjangoTemplates):
+    """Django templates backend that times top-level renders."""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample = Sample()
+        _local.sample = sample
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(sample.time_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            _local.sample = None
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        if response.streaming:
+            size = int(response.get('Content-Length', 0))
+        else:
+            size = len(response.content)
+        registry.observe(
+            match.view_name if match else UNRESOLVED,
+            response.status_code, duration, sample, size
+        )
+        return response
+
+
+def _escape(value):
+    return (
+        str(value).replace('\\', r'\\').replace('"', r'\"')
+        .replace('\n', r'\n')
+    )
+
+
+def _labels(**labels):
+    return '{' + ','.join(
+        f'{name}="{_escape(value)}"' for name, value in labels.items()
+    ) + '}'
+
+
+def _histogram_lines(name, counters):
+    lines = []
+    for view in sorted(counters):
+        buckets = counters[view]
+        total = 0
+        for label in BUCKET_LABELS:
+            total += buckets.get(label, 0)
+            lines.append(
+                f'{name}_bucket{_labels(view=view, le=label)} {total:g}'
+            )
+        lines.append(f'{name}_sum{_labels(view=view)} '
+                     f'{buckets.get("", 0):g}')
+        lines.append(f'{name}_count{_labels(view=view)} {total:g}')
+    return lines
+
+
+def render_metrics(counters):
+    """Prometheus text lines of summed registry counters."""
+    grouped = defaultdict(lambda: defaultdict(dict))
+    for key, value in counters.items():
+        metric, view, label = key.split('\t')
+        if metric == 'request_duration_sum':
+            metric, label = 'request_duration', ''
+        grouped[metric][view][label] = value
+    lines = []
+    for metric, (name, kind, help_text) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        views = grouped.get(metric, {})
+        if kind == 'histogram':
+            lines += _histogram_lines(name, views)
+            continue
+        for view in sorted(views):
+            for label, value in sorted(views[view].items()):
+                labels = _labels(view=view, status=label) if label else (
+                    _labels(view=view)
+                )
+                lines.append(f'{name}{labels} {value:g}')
+    return lines
+
+
+def collector_lines():
+    """Lines of the gauges returned by the METRICS_COLLECTORS functions.
+
+    A collector returns (name, type, help, samples) tuples, where samples
+    are (labels dict, value) pairs.
+    """
+    lines = []
+    for path in getattr(settings, 'METRICS_COLLECTORS', ()):
+        for name, kind, help_text, samples in import_string(path)():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                labels = _labels(**labels) if labels else ''
+                lines.append(f'{name}{labels} {value:g}')
+    return lines
+
+
+def metrics_view(request):
+    """Scrape endpoint: METRICS_TOKEN as a bearer token, or a staff user."""
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    allowed = request.user.is_staff or bool(token) and hmac.compare_digest(
+        header, f'Bearer {token}'
+    )
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        '\n'.join(
+            render_metrics(registry.collect()) + collector_lines()
+        ) + '\n',
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
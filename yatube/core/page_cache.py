@@ -0,0 +1,176 @@
+"""Full-page cache for anonymous visitors with tag-based invalidation.
+
+Each cached page remembers the version of every tag it depends on. Tag
+versions live in the same cache backend, so purging a tag is a single
+``set`` and works with any backend, including local-memory and file-based
+ones. A page is served only if all of its tag versions are still current.
+A version starts with the time of the bump, so the versions of a set of
+tags also tell when the newest of them changed.
+"""
+import hashlib
+import time
+import uuid
+from datetime import datetime
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.views.decorators.http import condition
+
+from .db_router import reading_replica
+from django.utils import timezone
+
+PAGE_CACHE_TIMEOUT = getattr(settings, 'PAGE_CACHE_TIMEOUT', 60 * 5)
+PAGE_CACHE_ALIAS = getattr(settings, 'PAGE_CACHE_ALIAS', 'default')
+REPLICA_MAX_LAG = getattr(settings, 'REPLICA_MAX_LAG', 30)
+
+
+def _cache():
+    return caches[PAGE_CACHE_ALIAS]
+
+
+def _page_key(request):
+    path = request.get_full_path().encode()
+    return 'page:' + hashlib.md5(path).hexdigest()
+
+
+def _tag_key(tag):
+    return f'page-tag:{tag}'
+
+
+def _new_version():
+    return f'{time.time():.6f}-{uuid.uuid4().hex[:8]}'
+
+
+def _bump(tags):
+    _cache().set_many(
+        {_tag_key(tag): _new_version() for tag in tags}, None
+    )
+
+
+def add_cache_tags(request, *tags):
+    """Declare what the page being rendered depends on."""
+    if not hasattr(request, 'page_cache_tags'):
+        request.page_cache_tags = set()
+    request.page_cache_tags.update(tags)
+
+
+def purge_cache_tags(*tags):
+    """Invalidate every cached page tagged with any of `tags`.
+
+    Tags are bumped right away and once more after commit, so a page
+    rendered from the pre-commit state cannot outlive the write.
+    """
+    if not tags:
+        return
+    _bump(tags)
+    transaction.on_commit(lambda: _bump(tags))
+
+
+def _current_versions(tags):
+    keys = {_tag_key(tag): tag for tag in tags}
+    versions = _cache().get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        _cache().set_many(missing, None)
+        versions.update(missing)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def tag_state(*tags):
+    """(ETag, last modified) of the content depending on `tags`.
+
+    Costs one cache lookup and no queries, so conditional GETs can be
+    answered before the content is built.
+    """
+    versions = _current_versions(tags)
+    etag = hashlib.md5(
+        ' '.join(versions[tag] for tag in sorted(versions)).encode()
+    ).hexdigest()
+    changed = max(
+        float(version.split('-')[0]) for version in versions.values()
+    )
+    return etag, datetime.fromtimestamp(changed, timezone.utc)
+
+
+def _is_fresh(entry):
+    keys = [_tag_key(tag) for tag in entry['tags']]
+    versions = _cache().get_many(keys)
+    return all(
+        versions.get(_tag_key(tag)) == version
+        for tag, version in entry['tags'].items()
+    )
+
+
+def anonymous_page_cache(view):
+    """Serve unauthenticated GETs of `view` from the page cache."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated):
+            return view(request, *args, **kwargs)
+        key = _page_key(request)
+        entry = _cache().get(key)
+        if entry is not None and _is_fresh(entry):
+            response = HttpResponse(
+                entry['content'], content_type=entry['content_type']
+            )
+            response['X-Page-Cache'] = 'hit'
+            return response
+        # Tags declared before rendering, by the scope of the page, are
+        # read now: a write committing while the page renders bumps them
+        # past the stored versions, so the page goes stale at once.
+        known = set(getattr(request, 'page_cache_tags', ()))
+        versions = _current_versions(known) if known else {}
+        response = view(request, *args, **kwargs)
+        tags = getattr(request, 'page_cache_tags', None)
+        if response.status_code == 200 and tags and not response.cookies:
+            timeout = PAGE_CACHE_TIMEOUT
+            if reading_replica():
+                # The replica may not have the write behind the tags yet.
+                timeout = min(timeout, REPLICA_MAX_LAG)
+            versions.update(_current_versions(tags - known))
+            _cache().set(key, {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'tags': versions,
+            }, timeout)
+        return response
+    return wrapper
+
+
+def conditional_page(scope, personal=True):
+    """Answer If-None-Match / If-Modified-Since of a view from tag versions.
+
+    `scope(request, *args, **kwargs)` returns the tags the page depends on
+    and runs once per request, before the view; they are also page cache
+    tags known before rendering, see anonymous_page_cache. Personal pages
+    mix the user into the ETag and get no Last-Modified when rendered for
+    a logged-in user, so a copy cached before logging in or out is never
+    revalidated as unchanged. Pages read from a replica may predate the
+    versions, so their ETag also expires every REPLICA_MAX_LAG seconds.
+    """
+    def state(request, *args, **kwargs):
+        if not hasattr(request, 'page_state'):
+            tags = scope(request, *args, **kwargs)
+            add_cache_tags(request, *tags)
+            etag, changed = tag_state(*tags)
+            salt = []
+            if personal and request.user.is_authenticated:
+                salt.append(f'user:{request.user.pk}')
+            if reading_replica():
+                salt.append(f'lag:{int(time.time() // REPLICA_MAX_LAG)}')
+            if salt:
+                etag = hashlib.md5(
+                    ':'.join([etag, *salt]).encode()
+                ).hexdigest()
+                changed = None
+            request.page_state = etag, changed
+        return request.page_state
+
+    return condition(
+        etag_func=lambda *args, **kwargs: state(*args, **kwargs)[0],
+        last_modified_func=lambda *args, **kwargs: state(*args, **kwargs)[1],
+    )
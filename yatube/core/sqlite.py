@@ -0,0 +1,24 @@
+"""Per-connection SQLite tuning.
+
+Each SQLite entry of DATABASES may carry a PRAGMAS dict. The pragmas are
+run on every new connection, since most of them (cache_size, mmap_size,
+busy_timeout) do not outlive the connection.
+"""
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def pragma_statements(pragmas):
+    return [f'PRAGMA {name} = {value}' for name, value in pragmas.items()]
+
+
+@receiver(connection_created)
+def apply_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = connection.settings_dict.get('PRAGMAS')
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(pragmas):
+            cursor.execute(statement)
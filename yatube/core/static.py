@@ -0,0 +1,202 @@
+"""Static files with content hashes, precompressed at collectstatic time.
+
+CompressedManifestStaticFilesStorage writes hashed copies and a manifest
+like ManifestStaticFilesStorage, then a gzip (and, when the brotli package
+is installed, a brotli) variant of each text asset next to it.
+StaticFilesMiddleware serves STATIC_ROOT from an index built once per
+process: a request costs a dict lookup, hashed names are immutable for a
+year and the smallest variant the client accepts is sent.
+MediaFilesMiddleware serves uploads from MEDIA_ROOT, which change at run
+time and so are looked up on each request.
+"""
+import gzip
+import mimetypes
+import os
+import posixpath
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import serve, was_modified_since
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = (
+    '.css', '.js', '.svg', '.ico', '.json', '.map', '.txt', '.xml', '.html',
+)
+# Content codings of the variants and the suffixes of their files.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=60'
+
+
+def _gzip(content):
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def _brotli(content):
+    return brotli.compress(content, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that also writes .gz and .br of text assets."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            for compressed in self.compress(name):
+                yield name, compressed, True
+
+    def compress(self, name):
+        """Write the variants of `name` that are smaller than it."""
+        if not name.endswith(COMPRESSIBLE):
+            return
+        with self.open(name) as original:
+            content = original.read()
+        compressors = [('.gz', _gzip)]
+        if brotli is not None:
+            compressors.append(('.br', _brotli))
+        for suffix, compress in compressors:
+            compressed = compress(content)
+            if len(compressed) >= len(content):
+                continue
+            path = self.path(name + suffix)
+            with open(path, 'wb') as variant:
+                variant.write(compressed)
+            yield name + suffix
+
+
+def accepted_encodings(header):
+    """Content codings with a non-zero q value in Accept-Encoding."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticFile:
+    def __init__(self, path, stat, variants, immutable):
+        self.path = path
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.last_modified = http_date(stat.st_mtime)
+        self.variants = variants
+        self.immutable = immutable
+        self.content_type = (
+            mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        )
+
+    def pick(self, accept_encoding):
+        """(path, size, coding) of the smallest acceptable variant."""
+        accepted = accepted_encodings(accept_encoding)
+        for coding, path, size in self.variants:
+            if coding in accepted:
+                return path, size, coding
+        return self.path, self.size, None
+
+
+def scan(root, hashed_names):
+    """Index the files under `root` by URL path relative to it."""
+    files = {}
+    suffixes = tuple(suffix for _, suffix in ENCODINGS)
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(suffixes):
+                continue
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            variants = []
+            for coding, suffix in ENCODINGS:
+                if os.path.exists(path + suffix):
+                    size = os.stat(path + suffix).st_size
+                    variants.append((coding, path + suffix, size))
+            variants.sort(key=lambda variant: variant[2])
+            files[name] = StaticFile(
+                path, os.stat(path), variants, name in hashed_names
+            )
+    return files
+
+
+class StaticFilesMiddleware:
+    """Serve collected static files without a separate web server."""
+
+    def __init__(self, get_response):
+        root = settings.STATIC_ROOT
+        if not root or not os.path.isdir(root):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        storage = CompressedManifestStaticFilesStorage(location=root)
+        self.files = scan(root, set(storage.hashed_files.values()))
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and request.path_info.startswith(
+                self.prefix):
+            name = posixpath.normpath(request.path_info[len(self.prefix):])
+            static_file = self.files.get(name)
+            if static_file is not None:
+                return self.serve(request, static_file)
+        return self.get_response(request)
+
+    def serve(self, request, static_file):
+        if not static_file.immutable and not was_modified_since(
+                request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                static_file.mtime, static_file.size):
+            return HttpResponseNotModified()
+        path, size, coding = static_file.pick(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        response = FileResponse(
+            open(path, 'rb'), content_type=static_file.content_type
+        )
+        del response['Content-Disposition']
+        response['Content-Length'] = size
+        response['Last-Modified'] = static_file.last_modified
+        response['Cache-Control'] = (
+            IMMUTABLE if static_file.immutable else REVALIDATE
+        )
+        if coding:
+            response['Content-Encoding'] = coding
+        if static_file.variants:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+class MediaFilesMiddleware:
+    """Serve uploaded files and their thumbnails from MEDIA_ROOT."""
+
+    def __init__(self, get_response):
+        if not settings.MEDIA_ROOT or not settings.MEDIA_URL:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.MEDIA_URL
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and request.path_info.startswith(
+                self.prefix):
+            try:
+                response = serve(
+                    request, request.path_info[len(self.prefix):],
+                    document_root=settings.MEDIA_ROOT
+                )
+            except Http404:
+                return self.get_response(request)
+            response['Cache-Control'] = REVALIDATE
+            return response
+        return self.get_response(request)
@@ -1,9 +1,10 @@
 from django.contrib import admin
 from .models import Post, Group
+from .search import matches
 
 
 class GroupAdmin(admin.ModelAdmin):
-    list_display = ('title', 'description',)
+    list_display = ('title', 'description', 'posts_count',)
     empty_value_display = '-пусто-'
 
 
@@ -20,6 +21,13 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Look the term up in the search index instead of LIKE '%term%'."""
+        if not search_term:
+            return queryset, False
+        found = matches(search_term).values('post')
+        return queryset.filter(pk__in=found), False
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
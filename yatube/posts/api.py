@@ -0,0 +1,163 @@
+"""Read-only JSON API over posts.
+
+Rows are read with values_list() and serialized straight from tuples, so a
+page builds no model instances. Lists are keyset pages navigated with the
+same ?after= / ?before= tokens as the HTML feeds; ?fields= picks the keys
+of each item and ?ids= hydrates many posts in one request.
+"""
+from functools import wraps
+
+from django.http import JsonResponse
+from django.views.decorators.http import require_safe
+
+from .models import Group, Post, User
+from .paginators import CursorPaginator, encode_token
+
+API_FIELDS = {
+    'id': 'pk',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated_at': 'updated_at',
+    'author': 'author__username',
+    'group': 'group__slug',
+}
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+API_MAX_IDS = 100
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class ValuesCursorPaginator(CursorPaginator):
+    """Keyset pages of tuples: the requested columns, pub_date and pk."""
+
+    def __init__(self, object_list, per_page, columns):
+        super().__init__(object_list, per_page)
+        self.columns = columns
+
+    def encode(self, item):
+        pub_date, pk = item[-2:]
+        return encode_token(pub_date.isoformat(), pk)
+
+    def fetch(self, queryset, limit):
+        return list(
+            queryset.values_list(*self.columns, 'pub_date', 'pk')[:limit]
+        )
+
+
+def api_view(view):
+    """Allow only safe methods and turn ApiError into a JSON error."""
+    @require_safe
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return JsonResponse(view(request, *args, **kwargs))
+        except ApiError as error:
+            return JsonResponse(
+                {'error': str(error)}, status=error.status
+            )
+    return wrapper
+
+
+def requested_fields(request):
+    fields = request.GET.get('fields')
+    if not fields:
+        return list(API_FIELDS)
+    fields = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in API_FIELDS]
+    if unknown or not fields:
+        raise ApiError(
+            'Неизвестные поля: ' + ', '.join(unknown)
+            + '. Доступны: ' + ', '.join(API_FIELDS)
+        )
+    return fields
+
+
+def serialize(rows, fields):
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get('limit', API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError('limit должен быть числом.')
+    return min(max(size, 1), API_MAX_PAGE_SIZE)
+
+
+def posts_page(request, posts):
+    fields = requested_fields(request)
+    paginator = ValuesCursorPaginator(
+        posts, page_size(request), [API_FIELDS[field] for field in fields]
+    )
+    page = paginator.cursor_page(
+        request.GET.get('after'), request.GET.get('before')
+    )
+    return {
+        'results': serialize(page, fields),
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
+
+
+def posts_by_ids(request):
+    try:
+        ids = [int(pk) for pk in request.GET['ids'].split(',') if pk]
+    except ValueError:
+        raise ApiError('ids должен быть списком чисел через запятую.')
+    if len(ids) > API_MAX_IDS:
+        raise ApiError(f'Не больше {API_MAX_IDS} ids за запрос.')
+    fields = requested_fields(request)
+    columns = [API_FIELDS[field] for field in fields]
+    rows = {
+        row[-1]: row[:-1]
+        for row in Post.objects.filter(pk__in=ids).values_list(
+            *columns, 'pk'
+        )
+    }
+    return {'results': serialize(
+        [rows[pk] for pk in dict.fromkeys(ids) if pk in rows], fields
+    )}
+
+
+@api_view
+def post_list(request):
+    """Feed of all posts, or the posts listed in ?ids=."""
+    if 'ids' in request.GET:
+        return posts_by_ids(request)
+    return posts_page(request, Post.objects.all())
+
+
+@api_view
+def post_detail(request, post_id):
+    fields = requested_fields(request)
+    row = Post.objects.filter(pk=post_id).values_list(
+        *[API_FIELDS[field] for field in fields]
+    ).first()
+    if row is None:
+        raise ApiError('Пост не найден.', status=404)
+    return dict(zip(fields, row))
+
+
+@api_view
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    if group_id is None:
+        raise ApiError('Группа не найдена.', status=404)
+    return posts_page(request, Post.objects.filter(group_id=group_id))
+
+
+@api_view
+def author_posts(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    if author_id is None:
+        raise ApiError('Автор не найден.', status=404)
+    return posts_page(request, Post.objects.filter(author_id=author_id))
@@ -0,0 +1,88 @@
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Count, F
+
+from .models import AuthorStat, Group, Post
+
+
+def change_group_count(group_id, delta):
+    if group_id is None:
+        return
+    groups = Group.objects.filter(pk=group_id)
+    if delta < 0:
+        groups = groups.filter(posts_count__gte=-delta)
+    groups.update(posts_count=F('posts_count') + delta)
+
+
+def change_author_count(author_id, delta):
+    stats = AuthorStat.objects.filter(author_id=author_id)
+    if delta < 0:
+        stats.filter(posts_count__gte=-delta).update(
+            posts_count=F('posts_count') + delta
+        )
+        return
+    if not stats.update(posts_count=F('posts_count') + delta):
+        # First post of the author: count the real rows, the new one
+        # is already inserted in the current transaction. A concurrent
+        # first post may create the row first; then count on top of it.
+        stat, created = AuthorStat.objects.get_or_create(
+            author_id=author_id, defaults={
+                'posts_count': Post.objects.filter(
+                    author_id=author_id
+                ).count()
+            }
+        )
+        if not created:
+            stats.update(posts_count=F('posts_count') + delta)
+
+
+def count_created_posts(posts):
+    """Bump counters once per group and author for a batch of posts."""
+    groups = Counter(post.group_id for post in posts)
+    authors = Counter(post.author_id for post in posts)
+    for group_id, count in groups.items():
+        change_group_count(group_id, count)
+    for author_id, count in authors.items():
+        change_author_count(author_id, count)
+
+
+def recount_posts(batch_size=1000):
+    """Repair drifted counters, returns (groups_fixed, authors_fixed)."""
+    with transaction.atomic():
+        stale_groups = [
+            Group(pk=pk, posts_count=real)
+            for pk, real in Group.objects.annotate(
+                real=Count('posts')
+            ).exclude(posts_count=F('real')).values_list('pk', 'real')
+        ]
+        Group.objects.bulk_update(
+            stale_groups, ['posts_count'], batch_size=batch_size
+        )
+        real = dict(
+            Post.objects.order_by().values_list('author').annotate(
+                real=Count('pk')
+            )
+        )
+        stored = dict(
+            AuthorStat.objects.values_list('author_id', 'posts_count')
+        )
+        missing = [
+            AuthorStat(author_id=author_id, posts_count=count)
+            for author_id, count in real.items() if author_id not in stored
+        ]
+        stale_authors = [
+            AuthorStat(author_id=author_id, posts_count=real.get(author_id, 0))
+            for author_id, count in stored.items()
+            if real.get(author_id, 0) != count
+        ]
+        # An explicit batch_size is not capped by the backend limits.
+        AuthorStat.objects.bulk_create(missing, batch_size=min(
+            batch_size, connection.ops.bulk_batch_size(
+                ['author', 'posts_count'], missing
+            )
+        ))
+        AuthorStat.objects.bulk_update(
+            stale_authors, ['posts_count'], batch_size=batch_size
+        )
+    return len(stale_groups), len(missing) + len(stale_authors)
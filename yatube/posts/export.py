@@ -0,0 +1,71 @@
+"""Constant-memory JSONL export of posts.
+
+Rows are read in keyset chunks ordered by (pub_date, id) as plain tuples,
+so memory stays flat whatever the table size, and the position of the last
+row can resume the next incremental export.
+"""
+import json
+import zlib
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Post
+from .paginators import CursorPaginator, decode_cursor, encode_token
+
+EXPORT_CHUNK = 2000
+EXPORT_FIELDS = ('pk', 'text', 'pub_date', 'author__username', 'group__slug')
+
+
+def parse_since(value):
+    """(pub_date, id) position from a cursor token or an ISO datetime."""
+    position = decode_cursor(value)
+    if position is not None:
+        return position
+    pub_date = parse_datetime(value)
+    if pub_date is None:
+        raise ValueError(f'Не удалось разобрать since: {value}')
+    if timezone.is_naive(pub_date):
+        pub_date = timezone.make_aware(pub_date, timezone.utc)
+    return pub_date, 0
+
+
+def export_chunks(since=None, chunk_size=EXPORT_CHUNK):
+    """Yield (JSONL bytes, position of the last row) chunk by chunk."""
+    paginator = CursorPaginator(Post.objects.all(), chunk_size)
+    rows = paginator.object_list.reverse()
+    if since is not None:
+        rows = paginator.seek(since, newer=True)
+    while True:
+        chunk = list(rows.values_list(*EXPORT_FIELDS)[:chunk_size])
+        if not chunk:
+            return
+        lines = [
+            json.dumps({
+                'id': pk,
+                'text': text,
+                'pub_date': pub_date.isoformat(),
+                'author': author,
+                'group': group,
+            }, ensure_ascii=False)
+            for pk, text, pub_date, author, group in chunk
+        ]
+        position = (chunk[-1][2], chunk[-1][0])
+        yield ('\n'.join(lines) + '\n').encode(), position
+        rows = paginator.seek(position, newer=True)
+
+
+def next_since(position):
+    """Token to pass as since to continue after `position`."""
+    pub_date, pk = position
+    return encode_token(pub_date.isoformat(), pk)
+
+
+def gzip_stream(chunks):
+    """Compress a stream of bytes into gzip format on the fly."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
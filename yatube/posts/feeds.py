@@ -0,0 +1,121 @@
+"""RSS and Atom feeds of the index, groups and authors.
+
+Feeds are polled often and mostly unchanged, so the ETag and Last-Modified
+come from the scope versions of the feed (see posts.scopes). An
+unchanged poll gets a 304 after one cache lookup and at most one indexed
+owner lookup, without querying posts or building the feed.
+"""
+from django.contrib.syndication.views import Feed
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+
+from core.page_cache import conditional_page
+from .models import Post
+from .scopes import author_scope, group_scope, index_scope
+
+FEED_SIZE = 20
+
+
+def conditional_feed(scope):
+    """Answer conditional GETs of a feed from the versions of its scope."""
+    def decorator(feed):
+        @conditional_page(scope, personal=False)
+        def view(request, **kwargs):
+            response = feed(request, **kwargs)
+            # Feed dates its response by the newest item; answering
+            # If-Modified-Since needs the tag time that condition sets.
+            del response['Last-Modified']
+            return response
+        return view
+    return decorator
+
+
+class LatestPostsFeed(Feed):
+    title = 'ЯTube: новые записи'
+    description = 'Последние записи всех авторов.'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def items(self):
+        return Post.objects.feed()[:FEED_SIZE]
+
+    def item_title(self, item):
+        return Truncator(item.text).words(8)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=(item.pk,))
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return request.scope_owner
+
+    def title(self, group):
+        return f'ЯTube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', args=(group.slug,))
+
+    def items(self, group):
+        return group.posts.feed()[:FEED_SIZE]
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return request.scope_owner
+
+    def title(self, author):
+        return f'ЯTube: {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return f'Записи пользователя {author.username}.'
+
+    def link(self, author):
+        return reverse('posts:profile', args=(author.username,))
+
+    def items(self, author):
+        return author.posts.feed()[:FEED_SIZE]
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupPostsAtomFeed(GroupPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, group):
+        return group.description
+
+
+class AuthorPostsAtomFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, author):
+        return self.description(author)
+
+
+latest_rss = conditional_feed(index_scope)(LatestPostsFeed())
+latest_atom = conditional_feed(index_scope)(LatestPostsAtomFeed())
+group_rss = conditional_feed(group_scope)(GroupPostsFeed())
+group_atom = conditional_feed(group_scope)(GroupPostsAtomFeed())
+author_rss = conditional_feed(author_scope)(AuthorPostsFeed())
+author_atom = conditional_feed(author_scope)(AuthorPostsAtomFeed())
@@ -0,0 +1,134 @@
+import os
+import tempfile
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connections
+from django.test import Client
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+BASELINE = {'PRAGMAS': {'journal_mode': 'DELETE'}, 'CONN_MAX_AGE': 0}
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность чтения лент и записи постов '
+            'на SQLite без настроек и с профилем PRAGMAS и постоянными '
+            'соединениями из DATABASES. Работает на временных копиях базы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=1)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--posts', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        database = connections.databases['default']
+        if database['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('bench_sqlite поддерживает только SQLite.')
+        original = dict(database)
+        profiles = {
+            'baseline': BASELINE,
+            'tuned': {
+                'PRAGMAS': original.get('PRAGMAS') or {},
+                'CONN_MAX_AGE': original.get('CONN_MAX_AGE', 0),
+            },
+        }
+        self.stdout.write(
+            f'{"профиль":<10}{"чтений/с":>10}{"записей/с":>11}'
+            f'{"блокировок":>12}'
+        )
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                for name, profile in profiles.items():
+                    connections['default'].close()
+                    # Connections of all threads share this dict.
+                    database.update(
+                        profile, NAME=os.path.join(directory, f'{name}.db')
+                    )
+                    self.prepare(options['posts'])
+                    reads, writes, locked = self.run(options)
+                    seconds = options['seconds']
+                    self.stdout.write(
+                        f'{name:<10}{reads / seconds:>10.0f}'
+                        f'{writes / seconds:>11.0f}{locked:>12}'
+                    )
+                    connections['default'].close()
+        finally:
+            database.clear()
+            database.update(original)
+
+    def prepare(self, posts):
+        call_command('migrate', verbosity=0)
+        cache.clear()
+        self.user = User.objects.create_user(username='bench')
+        self.group = Group.objects.create(title='Bench', slug='bench')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.user,
+                 group=self.group if i % 2 else None)
+            for i in range(posts)
+        )
+        self.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.user.username,)),
+        ]
+
+    def count(self, key):
+        with self.lock:
+            self.counts[key] += 1
+
+    def reader(self):
+        # Logged-in requests skip the page cache and hit the database.
+        client = Client()
+        client.force_login(self.user)
+        while not self.stop.is_set():
+            for url in self.urls:
+                try:
+                    client.get(url)
+                    self.count('reads')
+                except OperationalError:
+                    self.count('locked')
+        connections['default'].close()
+
+    def writer(self):
+        while not self.stop.is_set():
+            try:
+                Post.objects.create(
+                    text='Новый пост', author=self.user, group=self.group
+                )
+                self.count('writes')
+            except OperationalError:
+                self.count('locked')
+            # What the end of a request does to the connection.
+            close_old_connections()
+        connections['default'].close()
+
+    def run(self, options):
+        self.counts = {'reads': 0, 'writes': 0, 'locked': 0}
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+        threads = [
+            threading.Thread(target=self.reader)
+            for _ in range(options['readers'])
+        ] + [
+            threading.Thread(target=self.writer)
+            for _ in range(options['writers'])
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['seconds'])
+        self.stop.set()
+        for thread in threads:
+            thread.join()
+        return (
+            self.counts['reads'], self.counts['writes'],
+            self.counts['locked']
+        )
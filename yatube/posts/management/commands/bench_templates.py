@@ -0,0 +1,77 @@
+import statistics
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+from django.test import RequestFactory
+
+from posts.models import AuthorStat, Group, Post
+from posts.paginators import CountedPaginator
+from posts.views import P_COUNT
+
+TEMPLATES = ('posts/index.html', 'posts/profile.html', 'posts/group_list.html')
+
+
+def reset_loaders():
+    """Drop compiled templates kept by cached loaders."""
+    for engine in engines.all():
+        for loader in getattr(engine, 'engine', engine).template_loaders:
+            loader.reset()
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время рендера шаблонов лент без скомпилированных '
+            'шаблонов и с ними. Запускайте с настройками, в которых '
+            'включен кешируемый загрузчик, например '
+            '--settings=yatube.settings_production.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        post = Post.objects.filter(group__isnull=False).first()
+        if post is None:
+            raise CommandError('Нужен хотя бы один пост в группе.')
+        contexts = self.contexts(post)
+        engine = engines['django']
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        self.stdout.write(
+            f'{"шаблон":<24}{"холодный, мс":>14}{"теплый, мс":>14}'
+        )
+        for name in TEMPLATES:
+            timings = {}
+            for cold in (True, False):
+                samples = []
+                for _ in range(options['iterations']):
+                    if cold:
+                        reset_loaders()
+                    started = time.perf_counter()
+                    engine.get_template(name).render(contexts[name], request)
+                    samples.append((time.perf_counter() - started) * 1000)
+                timings[cold] = statistics.median(samples)
+            self.stdout.write(
+                f'{name:<24}{timings[True]:>14.2f}{timings[False]:>14.2f}'
+            )
+
+    def contexts(self, post):
+        group = Group.objects.get(pk=post.group_id)
+        author = post.author
+        feeds = {
+            'posts/index.html': (Post.objects.feed(), Post.objects.count()),
+            'posts/profile.html': (
+                author.posts.feed(), AuthorStat.count_for(author)
+            ),
+            'posts/group_list.html': (group.posts.feed(), group.posts_count),
+        }
+        contexts = {}
+        for name, (posts, count) in feeds.items():
+            paginator = CountedPaginator(list(posts[:P_COUNT]), P_COUNT, count)
+            contexts[name] = {
+                'page_obj': paginator.get_page(1),
+                'count': count,
+                'author': author,
+                'group': group,
+            }
+        return contexts
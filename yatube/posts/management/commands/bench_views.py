@@ -0,0 +1,237 @@
+import json
+import math
+import time
+import tracemalloc
+from importlib import import_module
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+URLCONFS = ('posts.urls', 'about.urls', 'users.urls')
+# Views that end the session of the client, which is restored after them.
+LOGOUT_VIEWS = {'users:logout'}
+AUTHORS = 50
+GROUPS = 10
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of sorted `samples`."""
+    return samples[max(math.ceil(fraction * len(samples)) - 1, 0)]
+
+
+def view_names():
+    """Namespaced names of every view in URLCONFS with its URL kwargs."""
+    names = []
+    for urlconf in URLCONFS:
+        module = import_module(urlconf)
+        for pattern in module.urlpatterns:
+            names.append((
+                f'{module.app_name}:{pattern.name}',
+                list(pattern.pattern.converters),
+            ))
+    return names
+
+
+def load_results(path):
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)['results']
+    except (OSError, ValueError, KeyError) as error:
+        raise CommandError(f'Не удалось прочитать {path}: {error}')
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержку (p50/p95/p99), число запросов к базе и '
+            'выделения памяти для каждого URL из posts, about и users на '
+            'наборах данных разного размера. Данные создаются в '
+            'транзакции, которая затем откатывается. С --compare '
+            'сравнивает два файла результатов и завершается с ошибкой, '
+            'если какое-то представление стало медленнее порога.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument(
+            '--sizes', default='100,1000',
+            help='Числа добавляемых постов через запятую.'
+        )
+        parser.add_argument('--output', '-o', help='Файл для JSON.')
+        parser.add_argument(
+            '--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+            help='Сравнить два файла результатов.'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=10,
+            help='Допустимый рост p95, в процентах.'
+        )
+        parser.add_argument(
+            '--min-delta', type=float, default=1,
+            help='Рост p95 меньше этого числа мс не считается регрессией.'
+        )
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            self.compare(*options['compare'], options)
+            return
+        try:
+            sizes = sorted(
+                int(size) for size in options['sizes'].split(',') if size
+            )
+        except ValueError:
+            raise CommandError('--sizes: список чисел через запятую.')
+        results = {}
+        for size in sizes:
+            with transaction.atomic():
+                results[str(size)] = self.bench_dataset(size, options)
+                transaction.set_rollback(True)
+            cache.clear()
+        report = {'iterations': options['iterations'], 'results': results}
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stderr.write(f'Результаты записаны в {options["output"]}')
+
+    def bench_dataset(self, size, options):
+        cache.clear()
+        self.seed(size)
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Постов: +{size}'))
+        self.stdout.write(
+            f'{"представление":<34}{"код":>5}{"p50, мс":>9}{"p95, мс":>9}'
+            f'{"p99, мс":>9}{"запросов":>10}{"память, КБ":>12}'
+        )
+        results = {}
+        for name, converters in view_names():
+            url = reverse(name, kwargs={
+                converter: self.url_kwargs[converter]
+                for converter in converters
+            })
+            results[name] = result = self.bench_view(
+                name, url, options['iterations']
+            )
+            self.stdout.write(
+                f'{name:<34}{result["status"]:>5}{result["p50_ms"]:>9.2f}'
+                f'{result["p95_ms"]:>9.2f}{result["p99_ms"]:>9.2f}'
+                f'{result["queries"]:>10}{result["alloc_kb"]:>12.1f}'
+            )
+        return results
+
+    def seed(self, size):
+        """Add `size` posts of AUTHORS authors in GROUPS groups."""
+        self.user = User.objects.create_user(
+            username='bench_views', is_staff=True
+        )
+        User.objects.bulk_create([
+            User(username=f'bench_views_{number}')
+            for number in range(AUTHORS - 1)
+        ])
+        Group.objects.bulk_create([
+            Group(title=f'Группа {number}', slug=f'bench-views-{number}')
+            for number in range(GROUPS)
+        ])
+        authors = [self.user] + list(
+            User.objects.filter(username__startswith='bench_views_')
+        )
+        groups = list(Group.objects.filter(slug__startswith='bench-views-'))
+        Post.objects.bulk_create((
+            Post(
+                text=f'Пост {number} для замеров скорости страниц',
+                author=authors[number % len(authors)],
+                group=groups[number % len(groups)] if number % 3 else None,
+            )
+            for number in range(size)
+        ), batch_size=1000)
+        post = Post.objects.filter(author=self.user).first()
+        self.url_kwargs = {
+            'slug': groups[0].slug,
+            'username': self.user.username,
+            'post_id': post.pk if post else 0,
+            'uidb64': urlsafe_base64_encode(force_bytes(self.user.pk)),
+            'token': default_token_generator.make_token(self.user),
+        }
+
+    def request(self, client, url):
+        # The test client closes the response itself, with
+        # close_old_connections disconnected; closing it again would send
+        # request_finished and close the connection inside the atomic
+        # block of handle().
+        response = client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def bench_view(self, name, url, iterations):
+        client = Client()
+        client.force_login(self.user)
+        self.request(client, url)
+        samples = []
+        for _ in range(iterations):
+            if name in LOGOUT_VIEWS:
+                client.force_login(self.user)
+            started = time.perf_counter()
+            self.request(client, url)
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        if name in LOGOUT_VIEWS:
+            client.force_login(self.user)
+        # Counted on one more request: tracing slows down the timed ones.
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.request(client, url)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return {
+            'url': url,
+            'status': response.status_code,
+            'p50_ms': percentile(samples, 0.5),
+            'p95_ms': percentile(samples, 0.95),
+            'p99_ms': percentile(samples, 0.99),
+            'queries': len(queries),
+            'alloc_kb': peak / 1024,
+        }
+
+    def compare(self, baseline_path, current_path, options):
+        baseline = load_results(baseline_path)
+        current = load_results(current_path)
+        threshold = options['threshold'] / 100
+        regressions = []
+        self.stdout.write(
+            f'{"постов":>8} {"представление":<34}{"p95 было":>10}'
+            f'{"p95 стало":>11}{"запросов":>12}'
+        )
+        for size, views in current.items():
+            for name, result in views.items():
+                before = baseline.get(size, {}).get(name)
+                if before is None:
+                    continue
+                slower = (
+                    result['p95_ms'] > before['p95_ms'] * (1 + threshold)
+                    and result['p95_ms'] - before['p95_ms']
+                    > options['min_delta']
+                )
+                more_queries = result['queries'] > before['queries']
+                style = self.style.ERROR if slower or more_queries else (
+                    self.style.SUCCESS
+                )
+                self.stdout.write(style(
+                    f'{size:>8} {name:<34}{before["p95_ms"]:>10.2f}'
+                    f'{result["p95_ms"]:>11.2f}'
+                    f'{before["queries"]:>6} → {result["queries"]:<4}'
+                ))
+                if slower or more_queries:
+                    regressions.append(f'{name} (+{size})')
+        if regressions:
+            raise CommandError('Регрессии: ' + ', '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
@@ -0,0 +1,57 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import (
+    EXPORT_CHUNK, export_chunks, gzip_stream, next_since, parse_since
+)
+
+
+class Command(BaseCommand):
+    help = ('Выгружает посты в JSONL с постоянным расходом памяти. '
+            'Токен для следующей инкрементальной выгрузки печатается '
+            'в stderr.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', '-o',
+            help='Файл для выгрузки, по умолчанию stdout.'
+        )
+        parser.add_argument(
+            '--since',
+            help='Токен прошлой выгрузки или дата ISO 8601: выгрузить '
+                 'только более новые посты.'
+        )
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK)
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = parse_since(options['since'])
+            except ValueError as error:
+                raise CommandError(error)
+        state = {'position': None, 'rows': 0}
+
+        def chunks():
+            for data, position in export_chunks(
+                    since, options['chunk_size']):
+                state['position'] = position
+                state['rows'] += data.count(b'\n')
+                yield data
+
+        stream = gzip_stream(chunks()) if options['gzip'] else chunks()
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for data in stream:
+                    output.write(data)
+        else:
+            for data in stream:
+                sys.stdout.buffer.write(data)
+            sys.stdout.buffer.flush()
+        self.stderr.write(f'Выгружено постов: {state["rows"]}.')
+        if state['position'] is not None:
+            self.stderr.write(
+                f'Следующий --since: {next_since(state["position"])}'
+            )
@@ -0,0 +1,73 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from posts.models import Post
+from posts.paginators import CursorPaginator
+from posts.views import P_COUNT
+
+# Plan steps that mean the feed is sorted or read without an index.
+BAD_PLAN = re.compile(r'TEMP B-TREE|^SCAN(?!.*\bUSING\b)')
+
+
+def feed_querysets():
+    """Querysets in the shape posts.views runs them, by label."""
+    position = (timezone.now(), 0)
+    feeds = {
+        'index': Post.objects.feed(),
+        'group_posts': Post.objects.feed().filter(group_id=1),
+        'profile': Post.objects.feed().filter(author_id=1),
+    }
+    querysets = {}
+    for name, posts in feeds.items():
+        paginator = CursorPaginator(posts, P_COUNT)
+        querysets[name] = paginator.object_list[:P_COUNT + 1]
+        querysets[f'{name} ?page='] = paginator.object_list[
+            P_COUNT:P_COUNT * 2
+        ]
+        querysets[f'{name} ?after='] = paginator.seek(position)[
+            :P_COUNT + 1
+        ]
+        querysets[f'{name} ?before='] = paginator.seek(
+            position, newer=True
+        )[:P_COUNT + 1]
+    querysets['post_detail'] = Post.objects.feed().select_related(
+        'author__post_stat'
+    ).filter(pk=1)
+    for scope in ('author_id', 'group_id'):
+        paginator = CursorPaginator(Post.objects.filter(**{scope: 1}), 1)
+        for newer in (False, True):
+            label = f'post_detail {scope} {"newer" if newer else "older"}'
+            querysets[label] = paginator.seek(
+                position, newer
+            ).values_list('pk', flat=True)[:1]
+    return querysets
+
+
+class Command(BaseCommand):
+    help = ('Выполняет EXPLAIN QUERY PLAN для запросов лент и падает, '
+            'если запрос сортирует во временном B-дереве или читает '
+            'таблицу целиком.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('feed_explain поддерживает только SQLite.')
+        failed = []
+        with connection.cursor() as cursor:
+            for name, queryset in feed_querysets().items():
+                sql, params = queryset.query.sql_with_params()
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                details = [row[-1] for row in cursor.fetchall()]
+                bad = [step for step in details if BAD_PLAN.search(step)]
+                if bad:
+                    failed.append(name)
+                style = self.style.ERROR if bad else self.style.SUCCESS
+                self.stdout.write(style(name))
+                for step in details:
+                    self.stdout.write(f'    {step}')
+        if failed:
+            raise CommandError(
+                'Запросы без подходящего индекса: ' + ', '.join(failed)
+            )
@@ -0,0 +1,234 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_slug
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.models import Group, ImportCheckpoint, Post
+
+User = get_user_model()
+
+LOOKUP_CHUNK = 500  # keeps IN (...) lists under the SQLite variable limit
+
+
+class RejectedRow(Exception):
+    pass
+
+
+def read_rows(stream, file_format):
+    if file_format == 'csv':
+        for row in csv.DictReader(stream):
+            yield row, row
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield None, line.rstrip('\n')
+            continue
+        yield (row if isinstance(row, dict) else None), line.rstrip('\n')
+
+
+def clean_pub_date(value):
+    if not value:
+        return None
+    try:
+        pub_date = parse_datetime(str(value))
+    except ValueError:
+        pub_date = None
+    if pub_date is None:
+        raise RejectedRow('некорректная дата')
+    if timezone.is_naive(pub_date):
+        pub_date = timezone.make_aware(pub_date, timezone.utc)
+    return pub_date
+
+
+class Lookup:
+    """Name to id cache that resolves misses in chunks."""
+
+    def __init__(self, model, field, create=False):
+        self.model = model
+        self.field = field
+        self.create = create
+        self.ids = {}
+
+    def resolve(self, names):
+        missing = sorted(set(names) - self.ids.keys())
+        for start in range(0, len(missing), LOOKUP_CHUNK):
+            self._load(missing[start:start + LOOKUP_CHUNK])
+        if self.create:
+            new = [name for name in missing if name not in self.ids]
+            if new:
+                self.model.objects.bulk_create(
+                    [self.model(**{self.field: name, 'title': name})
+                     for name in new],
+                    ignore_conflicts=True
+                )
+                for start in range(0, len(new), LOOKUP_CHUNK):
+                    self._load(new[start:start + LOOKUP_CHUNK])
+
+    def _load(self, names):
+        self.ids.update(self.model.objects.filter(
+            **{f'{self.field}__in': names}
+        ).values_list(self.field, 'pk'))
+
+
+class Command(BaseCommand):
+    help = ('Потоково загружает посты из JSONL или CSV с полями text, '
+            'author (username), group (slug) и pub_date. Контрольная '
+            'точка хранится в базе и сохраняется в одной транзакции с '
+            'пачкой постов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=('jsonl', 'csv'))
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--checkpoint',
+            help='Имя контрольной точки, по умолчанию абсолютный путь '
+                 'к файлу.'
+        )
+        parser.add_argument(
+            '--rejects',
+            help='Куда писать отклоненные строки, по умолчанию '
+                 '<path>.rejects.'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать с начала файла, игнорируя контрольную точку.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден.')
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl'
+        )
+        name = options['checkpoint'] or os.path.abspath(path)
+        if len(name) > ImportCheckpoint._meta.get_field('name').max_length:
+            raise CommandError('Слишком длинное имя контрольной точки.')
+        rejects_path = options['rejects'] or f'{path}.rejects'
+        batch_size = options['batch_size']
+        if options['restart']:
+            ImportCheckpoint.objects.filter(name=name).delete()
+        done = self.resume(name, rejects_path)
+        self.authors = Lookup(User, 'username')
+        self.groups = Lookup(Group, 'slug', create=True)
+        imported = rejected = 0
+        started = time.monotonic()
+        with open(path, newline='', encoding='utf-8') as stream, \
+                open(rejects_path, 'ab') as rejects:
+            rows = islice(read_rows(stream, file_format), done, None)
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                posts, errors = self.build_posts(batch, done)
+                for line, row, error in errors:
+                    rejects.write((json.dumps(
+                        {'line': line, 'error': error, 'row': row},
+                        ensure_ascii=False
+                    ) + '\n').encode())
+                rejects.flush()
+                done += len(batch)
+                # The checkpoint commits with the posts; rejects written
+                # past its rejects_size are cut off when resuming.
+                with transaction.atomic():
+                    self.insert(posts, batch_size)
+                    ImportCheckpoint.objects.update_or_create(
+                        name=name, defaults={
+                            'rows': done, 'rejects_size': rejects.tell()
+                        }
+                    )
+                imported += len(posts)
+                rejected += len(errors)
+                rate = imported / max(time.monotonic() - started, 1e-6)
+                self.stdout.write(
+                    f'{done} строк: загружено {imported}, '
+                    f'отклонено {rejected}, {rate:.0f} строк/с'
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: загружено {imported}, отклонено {rejected}.'
+        ))
+
+    def resume(self, name, rejects_path):
+        """Rows done by earlier runs; drops rejects of an unfinished batch."""
+        checkpoint = ImportCheckpoint.objects.filter(name=name).first()
+        if checkpoint is None:
+            return 0
+        if os.path.exists(rejects_path):
+            with open(rejects_path, 'r+b') as rejects:
+                rejects.truncate(checkpoint.rejects_size)
+        return checkpoint.rows
+
+    def insert(self, posts, batch_size):
+        """Insert posts and then restore the pub_date given in the file.
+
+        bulk_create fills auto_now_add fields, so the given dates are
+        written by a second, batched UPDATE of the new rows.
+        """
+        dated = [(post, post.pub_date) for post in posts if post.pub_date]
+        Post.objects.bulk_create(posts, batch_size=batch_size)
+        for post, pub_date in dated:
+            post.pub_date = pub_date
+        Post.objects.bulk_update(
+            [post for post, pub_date in dated], ['pub_date'],
+            batch_size=batch_size
+        )
+
+    def build_posts(self, batch, offset):
+        valid = []
+        errors = []
+        for number, (row, raw) in enumerate(batch, start=offset + 1):
+            try:
+                valid.append((number, raw, self.clean(row)))
+            except RejectedRow as error:
+                errors.append((number, raw, str(error)))
+        self.authors.resolve(row['author'] for _, _, row in valid)
+        self.groups.resolve(
+            row['group'] for _, _, row in valid if row['group']
+        )
+        posts = []
+        for number, raw, row in valid:
+            author_id = self.authors.ids.get(row['author'])
+            if author_id is None:
+                errors.append((number, raw, 'неизвестный автор'))
+                continue
+            posts.append(Post(
+                text=row['text'],
+                author_id=author_id,
+                group_id=self.groups.ids.get(row['group']),
+                pub_date=row['pub_date'],
+            ))
+        return posts, errors
+
+    def clean(self, row):
+        if row is None:
+            raise RejectedRow('строка не разбирается')
+        text = str(row.get('text') or '').strip()
+        author = str(row.get('author') or '').strip()
+        group = str(row.get('group') or '').strip() or None
+        if not text:
+            raise RejectedRow('пустой текст')
+        if not author:
+            raise RejectedRow('не указан автор')
+        if group:
+            try:
+                validate_slug(group)
+            except ValidationError:
+                raise RejectedRow('некорректный slug группы')
+        return {
+            'text': text, 'author': author, 'group': group,
+            'pub_date': clean_pub_date(row.get('pub_date')),
+        }
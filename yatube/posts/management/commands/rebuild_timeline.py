@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = 'Заново строит ленту главной страницы из таблицы постов.'
+
+    def handle(self, *args, **options):
+        ring = timeline.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'В ленте {len(ring.ids)} из {ring.count} постов.'
+        ))
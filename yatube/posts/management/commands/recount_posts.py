@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_posts
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики постов групп и авторов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        groups, authors = recount_posts(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено групп: {groups}, авторов: {authors}.'
+        ))
@@ -0,0 +1,80 @@
+import os
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from posts.seed import make_plan, seed
+
+
+class Command(BaseCommand):
+    help = ('Детерминированно создает синтетических пользователей, группы '
+            'и посты. Число постов у авторов и групп распределено '
+            'неравномерно, даты разнесены на несколько лет. Тексты '
+            'генерируются параллельно, строки вставляются пачками. '
+            'Одинаковые --seed, --until и --batch-size дают одинаковые '
+            'данные при любом числе процессов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--years', type=float, default=3,
+            help='На сколько лет назад от --until разнести даты.'
+        )
+        parser.add_argument(
+            '--until',
+            help='Дата самых новых постов, по умолчанию сегодня.'
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель Ципфа для числа постов у авторов и групп.'
+        )
+        parser.add_argument('--batch-size', type=int, default=20000)
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Процессов для генерации текстов.'
+        )
+        parser.add_argument('--locale', default='ru_RU')
+
+    def handle(self, *args, **options):
+        if options['posts'] and not options['users']:
+            raise CommandError('Для постов нужен хотя бы один пользователь.')
+        if options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError('--batch-size и --workers должны быть > 0.')
+        until = timezone.now().replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        if options['until']:
+            day = parse_date(options['until'])
+            if day is None:
+                raise CommandError('--until: дата в формате ГГГГ-ММ-ДД.')
+            until = timezone.make_aware(
+                datetime.combine(day, datetime.min.time()), timezone.utc
+            )
+        plan = make_plan(
+            options['seed'], options['users'], options['groups'], until,
+            options['years'], options['skew'], options['locale'],
+        )
+        self.started = time.monotonic()
+        self.kind = None
+        seed(
+            plan, options['posts'], options['batch_size'],
+            options['workers'], self.progress
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - self.started:.0f} с: '
+            f'пользователей {plan.users}, групп {plan.groups}, '
+            f'постов {options["posts"]}. Поисковый индекс: '
+            f'python manage.py rebuild_search_index.'
+        ))
+
+    def progress(self, kind, done, total):
+        if kind != self.kind:
+            self.kind, self.kind_started = kind, time.monotonic()
+        rate = done / max(time.monotonic() - self.kind_started, 1e-6)
+        self.stdout.write(f'{kind}: {done} из {total}, {rate:.0f} строк/с')
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineRing',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ids', models.TextField(blank=True, default='', verbose_name='Новые посты (JSON)')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+            ],
+            options={
+                'verbose_name': 'Лента главной',
+                'verbose_name_plural': 'Лента главной',
+            },
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -17,6 +17,10 @@ class Group(models.Model):
     description = models.TextField(
         verbose_name='Описание', null=True
     )
+    posts_count = models.PositiveIntegerField(
+        default=0, editable=False,
+        verbose_name='Количество постов'
+    )
 
     def __str__(self):
         return self.title
@@ -26,8 +30,34 @@ class Group(models.Model):
         verbose_name_plural = 'Группы'
 
 
+class PostQuerySet(models.QuerySet):
+    def feed(self):
+        """Posts as the feed templates show them."""
+        return self.select_related('author', 'group')
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Insert posts and apply the post signal side effects in bulk."""
+        from .signals import posts_bulk_created
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            if objs and not kwargs.get('ignore_conflicts'):
+                self._fill_missing_pks(objs)
+                posts_bulk_created(objs)
+        return objs
+
+    def _fill_missing_pks(self, objs):
+        # SQLite does not return ids from bulk inserts. The transaction
+        # holds the write lock, so the new rows are the newest ids.
+        missing = [obj for obj in objs if obj.pk is None]
+        if not missing:
+            return
+        pks = self.order_by('-pk').values_list('pk', flat=True)
+        for obj, pk in zip(missing, reversed(list(pks[:len(missing)]))):
+            obj.pk = pk
+
+
 class Post(models.Model):
-    objects = None
+    objects = PostQuerySet.as_manager()
     text = models.TextField(
         verbose_name='Пост',
         help_text='Введите текст вашего сообщения.'
@@ -35,24 +65,177 @@ class Post(models.Model):
     pub_date = models.DateTimeField(
         auto_now_add=True, verbose_name='Дата'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True, verbose_name='Изменено'
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name='posts',
-        verbose_name='Автор'
+        verbose_name='Автор',
+        db_index=False
     )
     group = models.ForeignKey(
         Group, on_delete=models.SET_NULL,
         blank=True, null=True,
         related_name='posts',
         verbose_name='Группа',
+        db_index=False,
         help_text='Выберите группу, необязательно.'
     )
+    image = models.ImageField(
+        upload_to='posts/', blank=True,
+        width_field='image_width', height_field='image_height',
+        verbose_name='Картинка',
+        help_text='Загрузите картинку, необязательно.'
+    )
+    image_width = models.PositiveIntegerField(
+        null=True, blank=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        null=True, blank=True, editable=False
+    )
+    thumbnails = models.TextField(
+        default='', blank=True, editable=False,
+        verbose_name='Миниатюры (JSON)'
+    )
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        # Counter receivers in signals.py run inside this transaction.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
     class Meta:
-        ordering = ["-pub_date"]
+        ordering = ["-pub_date", "-id"]
+        indexes = [
+            models.Index(fields=['pub_date', 'id'], name='post_feed_idx'),
+            models.Index(
+                fields=['author', 'pub_date', 'id'],
+                name='post_author_feed_idx'
+            ),
+            models.Index(
+                fields=['group', 'pub_date', 'id'],
+                name='post_group_feed_idx'
+            ),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+
+
+class AuthorStat(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='post_stat',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество постов'
+    )
+
+    def __str__(self):
+        return f'{self.author}: {self.posts_count}'
+
+    @classmethod
+    def count_for(cls, author):
+        """Stored post count of an author, 0 if nothing was counted yet."""
+        count = cls.objects.filter(author=author).values_list(
+            'posts_count', flat=True
+        ).first()
+        return count or 0
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+
+class SearchTerm(models.Model):
+    term = models.CharField(
+        max_length=64, primary_key=True,
+        verbose_name='Основа слова'
+    )
+    documents = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество постов'
+    )
+
+    def __str__(self):
+        return self.term
+
+    class Meta:
+        verbose_name = 'Поисковый термин'
+        verbose_name_plural = 'Поисковые термины'
+
+
+class Posting(models.Model):
+    term = models.CharField(
+        max_length=64,
+        verbose_name='Основа слова'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='postings',
+        verbose_name='Пост'
+    )
+    frequency = models.PositiveSmallIntegerField(
+        verbose_name='Число вхождений'
+    )
+
+    def __str__(self):
+        return f'{self.term}: {self.post_id}'
+
+    class Meta:
+        unique_together = ('term', 'post')
+        verbose_name = 'Вхождение термина'
+        verbose_name_plural = 'Вхождения терминов'
+
+
+class ImportCheckpoint(models.Model):
+    """Progress of import_posts, saved in the transaction of each batch."""
+    name = models.CharField(
+        max_length=255, unique=True,
+        verbose_name='Импорт'
+    )
+    rows = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Обработано строк'
+    )
+    rejects_size = models.BigIntegerField(
+        default=0,
+        verbose_name='Размер файла отклоненных строк'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True, verbose_name='Изменено'
+    )
+
+    def __str__(self):
+        return f'{self.name}: {self.rows}'
+
+    class Meta:
+        verbose_name = 'Контрольная точка импорта'
+        verbose_name_plural = 'Контрольные точки импорта'
+
+
+class TimelineRing(models.Model):
+    """Newest post ids of the index page, see posts.timeline."""
+    ids = models.TextField(
+        default='', blank=True,
+        verbose_name='Новые посты (JSON)'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество постов'
+    )
+
+    def __str__(self):
+        return f'{self.posts_count}'
+
+    class Meta:
+        verbose_name = 'Лента главной'
+        verbose_name_plural = 'Лента главной'
@@ -0,0 +1,172 @@
+import base64
+import binascii
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+PAGE_NUMBER_LIMIT = 100  # max pages served with ?page= navigation
+PAGES_ON_EACH_SIDE = 2  # page links around the current one
+PAGES_ON_ENDS = 1  # page links at the start and the end
+ELLIPSIS = '…'
+
+
+def encode_token(*parts):
+    """Opaque URL-safe token for a keyset position."""
+    raw = '|'.join(str(part) for part in parts).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_token(token, *types):
+    """Parse a token made by encode_token or return None if malformed."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        parts = raw.split('|')
+        if len(parts) != len(types):
+            return None
+        return tuple(type_(part) for type_, part in zip(types, parts))
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+
+
+def _datetime(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+
+def encode_cursor(post):
+    """Opaque token for the (pub_date, id) position of a post."""
+    return encode_token(post.pub_date.isoformat(), post.pk)
+
+
+def decode_cursor(token):
+    """Return (pub_date, id) from a token or None if it is malformed."""
+    return decode_token(token, _datetime, int)
+
+
+def elided_page_range(num_pages, number, on_each_side=PAGES_ON_EACH_SIDE,
+                      on_ends=PAGES_ON_ENDS):
+    """Page numbers to link with gaps elided, bounded in size.
+
+    Backport of Paginator.get_elided_page_range from Django 3.2.
+    """
+    if num_pages <= (on_each_side + on_ends) * 2:
+        return list(range(1, num_pages + 1))
+    pages = []
+    if number > 1 + on_each_side + on_ends + 1:
+        pages += range(1, on_ends + 1)
+        pages.append(ELLIPSIS)
+        pages += range(number - on_each_side, number + 1)
+    else:
+        pages += range(1, number + 1)
+    if number < num_pages - on_each_side - on_ends - 1:
+        pages += range(number + 1, number + on_each_side + 1)
+        pages.append(ELLIPSIS)
+        pages += range(num_pages - on_ends + 1, num_pages + 1)
+    else:
+        pages += range(number + 1, num_pages + 1)
+    return pages
+
+
+class CountedPaginator(Paginator):
+    """Paginator that trusts a stored row count instead of COUNT(*)."""
+
+    def __init__(self, object_list, per_page, count):
+        super().__init__(object_list, per_page)
+        self.count = count
+
+
+class CursorPage(Page):
+    """Page of a keyset feed, navigated by ?after= / ?before= tokens."""
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self.object_list)} items>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return self.paginator.encode(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return self.paginator.encode(self.object_list[0])
+        return None
+
+
+class CursorPaginator(Paginator):
+    """Keyset paginator over (pub_date, id), newest first.
+
+    Subclasses paginate other keys by overriding ordering, encode, decode,
+    seek and fetch. Every page is a single index seek with LIMIT
+    per_page + 1, so neither OFFSET nor COUNT(*) is executed no matter how
+    deep the reader goes.
+    """
+
+    ordering = ('-pub_date', '-pk')
+
+    def __init__(self, object_list, per_page):
+        super().__init__(object_list.order_by(*self.ordering), per_page)
+
+    def encode(self, item):
+        return encode_cursor(item)
+
+    def decode(self, token):
+        return decode_cursor(token)
+
+    def fetch(self, queryset, limit):
+        return list(queryset[:limit])
+
+    def seek(self, position, newer=False):
+        """Rows strictly older (or newer) than a (pub_date, id) position.
+
+        The plain pub_date bound duplicates the row-value condition so the
+        database can start an index range scan at the cursor.
+        """
+        pub_date, pk = position
+        if newer:
+            return self.object_list.filter(pub_date__gte=pub_date).filter(
+                Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+            ).order_by('pub_date', 'pk')
+        return self.object_list.filter(pub_date__lte=pub_date).filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+        )
+
+    def cursor_page(self, after=None, before=None):
+        """Return the page following `after` or preceding `before`."""
+        after = self.decode(after) if after else None
+        before = self.decode(before) if before else None
+        limit = self.per_page + 1
+        if before is not None:
+            rows = self.fetch(self.seek(before, newer=True), limit)
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            # Usually the page the reader came from, unless it is gone.
+            has_next = bool(rows) and self.seek(
+                self.decode(self.encode(rows[-1]))
+            ).exists()
+            return CursorPage(rows, self, has_next, has_previous)
+        queryset = self.object_list
+        if after is not None:
+            queryset = self.seek(after)
+        rows = self.fetch(queryset, limit)
+        has_next = len(rows) > self.per_page
+        return CursorPage(
+            rows[:self.per_page], self, has_next, after is not None
+        )
@@ -0,0 +1,59 @@
+"""Scope versions of the posts pages and feeds.
+
+A scope is the global feed, a group, an author or a single post. Its tags
+are bumped by posts.signals whenever a post in it is created, edited,
+moved or deleted, so a conditional GET can be answered from the tag
+versions before any post is loaded. Scope functions look up the owner of
+the page once and leave it in request.scope_owner for the view, and
+declare the feed tags of the page before it renders.
+"""
+from django.shortcuts import get_object_or_404
+
+from core.page_cache import add_cache_tags
+from .models import Group, Post, User
+
+
+def scope_tags(group_id, author_id):
+    """Version tags of the scopes a post belongs to.
+
+    Unlike feed tags these change on edits too. Author and group names
+    shown next to posts are versioned by the shared 'scope:names'.
+    """
+    tags = ['scope', f'scope:author:{author_id}']
+    if group_id is not None:
+        tags.append(f'scope:group:{group_id}')
+    return tags
+
+
+def index_scope(request):
+    add_cache_tags(request, 'feed')
+    return 'scope', 'scope:names'
+
+
+def group_scope(request, slug):
+    request.scope_owner = get_object_or_404(Group, slug=slug)
+    pk = request.scope_owner.pk
+    add_cache_tags(request, f'group-feed:{pk}', f'group:{pk}')
+    return f'scope:group:{pk}', 'scope:names'
+
+
+def author_scope(request, username):
+    request.scope_owner = get_object_or_404(User, username=username)
+    pk = request.scope_owner.pk
+    add_cache_tags(request, f'author-feed:{pk}', f'author:{pk}')
+    return f'scope:author:{pk}', 'scope:names'
+
+
+def post_scope(request, post_id):
+    post = get_object_or_404(
+        Post.objects.feed().select_related('author__post_stat'), pk=post_id
+    )
+    request.scope_owner = post
+    add_cache_tags(
+        request, f'post:{post.pk}', f'author-feed:{post.author_id}'
+    )
+    tags = [f'scope:author:{post.author_id}', 'scope:names']
+    if post.group_id is not None:
+        add_cache_tags(request, f'group-feed:{post.group_id}')
+        tags.append(f'scope:group:{post.group_id}')
+    return tags
@@ -0,0 +1,213 @@
+"""Full-text search over posts backed by an inverted index.
+
+Post texts are split into words, stop words are dropped and the rest are
+reduced to Russian stems. Posting rows map a stem to the posts containing
+it, SearchTerm keeps the number of posts per stem for ranking.
+"""
+import math
+import re
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import (
+    Case, Count, F, IntegerField, Q, Sum, Value, When
+)
+
+from .models import Post, Posting, SearchTerm
+from .paginators import CursorPaginator, decode_token, encode_token
+from .stemmer import stem
+from .timeline import get_timeline
+
+WORD_RE = re.compile(r'\w+')
+MAX_FREQUENCY = 32767
+BATCH_SIZE = 500  # keeps IN (...) lists under the SQLite variable limit
+STOP_WORDS = frozenset(
+    'а без бы в во вот вы да для до его ее ей если же за и из или им их к '
+    'как ко когда кто ли мне мы на над не нет ни но о об он она они от по '
+    'при с со так также то тоже только ты у уже что чтобы это я'.split()
+)
+
+
+def terms(text):
+    """Stems of the meaningful words of a text, in order."""
+    words = WORD_RE.findall(text.lower().replace('ё', 'е'))
+    return [
+        stem(word)[:64] for word in words
+        if len(word) > 1 and word not in STOP_WORDS
+    ]
+
+
+def term_frequencies(text):
+    return {
+        term: min(count, MAX_FREQUENCY)
+        for term, count in Counter(terms(text)).items()
+    }
+
+
+def _chunks(items):
+    items = list(items)
+    for start in range(0, len(items), BATCH_SIZE):
+        yield items[start:start + BATCH_SIZE]
+
+
+def _change_documents(deltas):
+    """Apply per-term changes of the document counts."""
+    created = [term for term, delta in deltas.items() if delta > 0]
+    SearchTerm.objects.bulk_create(
+        [SearchTerm(term=term) for term in created],
+        batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+    by_delta = {}
+    for term, delta in deltas.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(term)
+    for delta, changed in by_delta.items():
+        for chunk in _chunks(changed):
+            SearchTerm.objects.filter(term__in=chunk).update(
+                documents=F('documents') + delta
+            )
+
+
+def index_posts(posts):
+    """Index freshly inserted posts that have no postings yet."""
+    postings = []
+    deltas = Counter()
+    for post in posts:
+        for term, frequency in term_frequencies(post.text).items():
+            postings.append(
+                Posting(term=term, post_id=post.pk, frequency=frequency)
+            )
+            deltas[term] += 1
+    with transaction.atomic():
+        Posting.objects.bulk_create(postings, batch_size=BATCH_SIZE)
+        _change_documents(deltas)
+
+
+def reindex_post(post):
+    """Bring the postings of an edited post in line with its text."""
+    new = term_frequencies(post.text)
+    old = dict(
+        Posting.objects.filter(post=post).values_list('term', 'frequency')
+    )
+    if new == old:
+        return
+    removed = old.keys() - new.keys()
+    added = new.keys() - old.keys()
+    with transaction.atomic():
+        for chunk in _chunks(removed):
+            Posting.objects.filter(post=post, term__in=chunk).delete()
+        for term in new.keys() & old.keys():
+            if new[term] != old[term]:
+                Posting.objects.filter(post=post, term=term).update(
+                    frequency=new[term]
+                )
+        Posting.objects.bulk_create(
+            [Posting(term=term, post=post, frequency=new[term])
+             for term in added],
+            batch_size=BATCH_SIZE
+        )
+        deltas = dict.fromkeys(added, 1)
+        deltas.update(dict.fromkeys(removed, -1))
+        _change_documents(deltas)
+
+
+def indexed_terms(post):
+    """Terms a post is indexed under, read before deleting it."""
+    return list(
+        Posting.objects.filter(post=post).values_list('term', flat=True)
+    )
+
+
+def forget_terms(terms):
+    """Forget a deleted post; its postings go away by cascade."""
+    _change_documents(dict.fromkeys(terms, -1))
+
+
+def rebuild_index(batch_size=1000):
+    """Drop and rebuild the whole index, returns the number of posts."""
+    with transaction.atomic():
+        Posting.objects.all().delete()
+        SearchTerm.objects.all().delete()
+        indexed = 0
+        for chunk in _chunks_of(Post.objects.only('pk', 'text'), batch_size):
+            index_posts(chunk)
+            indexed += len(chunk)
+    return indexed
+
+
+def _chunks_of(queryset, size):
+    chunk = []
+    for post in queryset.order_by('pk').iterator(chunk_size=size):
+        chunk.append(post)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def matches(query):
+    """Posts containing every stem of `query`, annotated with a score.
+
+    The score is the sum of term frequencies weighted by an integer
+    inverse document frequency, so keyset comparisons stay exact.
+    """
+    query_terms = set(terms(query))
+    documents = dict(
+        SearchTerm.objects.filter(
+            term__in=query_terms, documents__gt=0
+        ).values_list('term', 'documents')
+    )
+    weights = []
+    if query_terms and len(documents) == len(query_terms):
+        total = max(get_timeline().count, 1)
+        weights = [
+            When(term=term, then=F('frequency') * Value(
+                int(1000 * math.log(1 + total / count))
+            ))
+            for term, count in documents.items()
+        ]
+    found = Posting.objects.filter(term__in=query_terms).values(
+        'post'
+    ).annotate(
+        matched=Count('term'),
+        score=Sum(Case(
+            *weights, default=Value(0), output_field=IntegerField()
+        )),
+    ).filter(matched=len(query_terms))
+    return found if weights else found.none()
+
+
+class SearchPaginator(CursorPaginator):
+    """Keyset paginator over (score, post id), best matches first."""
+
+    ordering = ('-score', '-post')
+
+    def __init__(self, query, per_page):
+        super().__init__(matches(query), per_page)
+
+    def encode(self, item):
+        return encode_token(item.search_score, item.pk)
+
+    def decode(self, token):
+        return decode_token(token, int, int)
+
+    def seek(self, position, newer=False):
+        score, pk = position
+        if newer:
+            return self.object_list.filter(
+                Q(score__gt=score) | Q(score=score, post__gt=pk)
+            ).order_by('score', 'post')
+        return self.object_list.filter(
+            Q(score__lt=score) | Q(score=score, post__lt=pk)
+        )
+
+    def fetch(self, queryset, limit):
+        rows = list(queryset.values_list('post', 'score')[:limit])
+        posts = Post.objects.feed().in_bulk([pk for pk, score in rows])
+        found = []
+        for pk, score in rows:
+            if pk in posts:
+                posts[pk].search_score = score
+                found.append(posts[pk])
+        return found
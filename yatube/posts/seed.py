@@ -0,0 +1,206 @@
+"""Deterministic synthetic users, groups and posts at scale.
+
+Rows are generated in batches by a pool of processes. A batch takes its
+random state from (seed, kind, batch number) only, so the same options
+give the same data whatever the number of workers. Authors and groups are
+picked with a Zipf-like skew, and post dates spread over the period with
+more posts in recent months.
+
+The main process streams the batches into the database with executemany,
+one transaction per batch, and skips the per-post side effects of
+PostQuerySet.bulk_create; counters and the timeline are rebuilt once at
+the end.
+"""
+import random
+from collections import deque, namedtuple
+from datetime import datetime
+from multiprocessing import Pool
+
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+
+from core.page_cache import purge_cache_tags
+from . import timeline
+from .counters import recount_posts
+from .models import Group, Post
+
+User = get_user_model()
+
+SCATTER = 2654435761  # a prime: rank * SCATTER % n permutes range(n)
+NO_GROUP_SHARE = 0.2
+MAX_SENTENCES = 20
+
+Plan = namedtuple('Plan', (
+    'seed', 'locale', 'first_user', 'users', 'first_group', 'groups',
+    'first_post', 'until', 'span', 'skew',
+))
+
+# Inserted columns of each kind and the positions of epoch timestamps.
+COLUMNS = {
+    'users': (User, (
+        'id', 'password', 'username', 'first_name', 'last_name', 'email',
+        'is_superuser', 'is_staff', 'is_active', 'date_joined',
+    ), (9,)),
+    'groups': (Group, (
+        'id', 'title', 'slug', 'description', 'posts_count',
+    ), ()),
+    'posts': (Post, (
+        'id', 'text', 'pub_date', 'updated_at', 'author_id', 'group_id',
+        'image', 'thumbnails',
+    ), (2, 3)),
+}
+
+_fakers = {}
+
+
+def zipf_rank(rng, n, skew):
+    """Rank in range(n), rank r drawn with weight about 1 / (r + 1)**skew."""
+    u = rng.random()
+    if abs(skew - 1) < 1e-9:
+        x = (n + 1) ** u
+    else:
+        x = (1 + u * ((n + 1) ** (1 - skew) - 1)) ** (1 / (1 - skew))
+    return min(int(x) - 1, n - 1)
+
+
+def pick(rng, first, n, skew):
+    """Id of a skewed pick, with popular ids scattered over the range."""
+    return first + zipf_rank(rng, n, skew) * SCATTER % n
+
+
+def user_rows(plan, rng, fake, start, count):
+    rows = []
+    for pk in range(plan.first_user + start,
+                    plan.first_user + start + count):
+        rows.append((
+            pk, '!', f'user{pk}', fake.first_name(), fake.last_name(),
+            f'user{pk}@example.com', False, False, True,
+            plan.until - plan.span * rng.random(),
+        ))
+    return rows
+
+
+def group_rows(plan, rng, fake, start, count):
+    rows = []
+    for pk in range(plan.first_group + start,
+                    plan.first_group + start + count):
+        rows.append((
+            pk, fake.catch_phrase()[:200], f'group-{pk}', fake.sentence(), 0,
+        ))
+    return rows
+
+
+def post_rows(plan, rng, fake, start, count):
+    rows = []
+    for pk in range(plan.first_post + start,
+                    plan.first_post + start + count):
+        group_id = None
+        if plan.groups and rng.random() >= NO_GROUP_SHARE:
+            group_id = pick(rng, plan.first_group, plan.groups, plan.skew)
+        # Squaring the fraction puts more posts in recent months.
+        pub_date = plan.until - plan.span * rng.random() ** 2
+        sentences = min(int(rng.expovariate(1 / 3)) + 1, MAX_SENTENCES)
+        rows.append((
+            pk, fake.paragraph(nb_sentences=sentences), pub_date, pub_date,
+            pick(rng, plan.first_user, plan.users, plan.skew), group_id,
+            '', '',
+        ))
+    return rows
+
+
+GENERATORS = {'users': user_rows, 'groups': group_rows, 'posts': post_rows}
+
+
+def generate(job):
+    """Rows of one batch: job is (kind, plan, batch number, start, count)."""
+    kind, plan, batch, start, count = job
+    state = f'{plan.seed}:{kind}:{batch}'
+    if plan.locale not in _fakers:
+        _fakers[plan.locale] = Faker(plan.locale)
+    fake = _fakers[plan.locale]
+    fake.seed_instance(state)
+    return GENERATORS[kind](plan, random.Random(state), fake, start, count)
+
+
+def _ordered(pool, jobs, window):
+    """Results of `jobs` in order, with at most `window` in flight."""
+    if pool is None:
+        yield from map(generate, jobs)
+        return
+    pending = deque()
+    for job in jobs:
+        pending.append(pool.apply_async(generate, (job,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def _insert(kind, rows):
+    model, columns, dates = COLUMNS[kind]
+    adapt = connection.ops.adapt_datetimefield_value
+    if dates:
+        rows = [
+            tuple(
+                adapt(datetime.fromtimestamp(value, timezone.utc))
+                if position in dates else value
+                for position, value in enumerate(row)
+            )
+            for row in rows
+        ]
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(column) for column in columns),
+        ', '.join(['%s'] * len(columns)),
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def make_plan(seed, users, groups, until, years, skew, locale='ru_RU'):
+    return Plan(
+        seed=seed, locale=locale,
+        first_user=next_id(User), users=users,
+        first_group=next_id(Group), groups=groups,
+        first_post=next_id(Post),
+        until=until.timestamp(), span=years * 365.25 * 24 * 60 * 60,
+        skew=skew,
+    )
+
+
+def seed(plan, posts, batch_size=20000, workers=1, progress=None):
+    """Insert plan.users users, plan.groups groups and `posts` posts."""
+    totals = {'users': plan.users, 'groups': plan.groups, 'posts': posts}
+    pool = Pool(workers) if workers > 1 else None
+    try:
+        for kind, total in totals.items():
+            jobs = [
+                (kind, plan, batch, start, min(batch_size, total - start))
+                for batch, start in enumerate(range(0, total, batch_size))
+            ]
+            done = 0
+            for rows in _ordered(pool, jobs, workers * 2):
+                _insert(kind, rows)
+                done += len(rows)
+                if progress is not None:
+                    progress(kind, done, total)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(
+                no_style(), [User, Group, Post]):
+            cursor.execute(sql)
+    recount_posts()
+    timeline.reset()
+    purge_cache_tags('feed', 'scope', 'scope:names')
@@ -0,0 +1,170 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from core.page_cache import purge_cache_tags
+from tasks.queue import enqueue
+from .counters import (
+    change_author_count, change_group_count, count_created_posts
+)
+from .models import Group, Post
+from .scopes import scope_tags
+from . import search, tasks, timeline
+
+User = get_user_model()
+
+NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def feed_tags(group_id, author_id):
+    """Page cache tags of the feeds a post is listed in."""
+    tags = ['feed', f'author-feed:{author_id}']
+    if group_id is not None:
+        tags.append(f'group-feed:{group_id}')
+    return tags
+
+
+def post_tags(group_id, author_id):
+    return (
+        feed_tags(group_id, author_id)
+        + scope_tags(group_id, author_id)
+    )
+
+
+def queue_thumbnails(post):
+    if post.image:
+        enqueue(
+            tasks.make_thumbnails, post_id=post.pk,
+            key=f'thumbnails:{post.pk}:{post.image.name}'
+        )
+
+
+def posts_bulk_created(posts):
+    """Side effects of PostQuerySet.bulk_create, which sends no signals."""
+    count_created_posts(posts)
+    pks = [post.pk for post in posts]
+    for start in range(0, len(pks), search.BATCH_SIZE):
+        enqueue(
+            tasks.index_new_posts,
+            post_ids=pks[start:start + search.BATCH_SIZE]
+        )
+    timeline.reset()
+    tags = set()
+    for post in posts:
+        queue_thumbnails(post)
+        tags.update(post_tags(post.group_id, post.author_id))
+    purge_cache_tags(*tags)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_owners(sender, instance, **kwargs):
+    """Keep the stored group and author to diff them after saving.
+
+    A replaced image drops the thumbnails of the old one.
+    """
+    instance._old_owners = None
+    instance._image_changed = bool(instance.image)
+    if instance._state.adding:
+        return
+    stored = Post.objects.filter(pk=instance.pk).values_list(
+        'group_id', 'author_id', 'image'
+    ).first()
+    if stored is None:
+        return
+    instance._old_owners = stored[:2]
+    instance._image_changed = stored[2] != instance.image.name
+    if instance._image_changed:
+        instance.thumbnails = ''
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    old_owners = getattr(instance, '_old_owners', None)
+    if created or old_owners is None:
+        change_author_count(instance.author_id, 1)
+        change_group_count(instance.group_id, 1)
+        timeline.push(instance)
+        enqueue(tasks.index_new_posts, post_ids=[instance.pk])
+        queue_thumbnails(instance)
+        purge_cache_tags(*post_tags(instance.group_id, instance.author_id))
+        return
+    enqueue(tasks.reindex_post, post_id=instance.pk)
+    if instance._image_changed:
+        queue_thumbnails(instance)
+    old_group_id, old_author_id = old_owners
+    tags = [f'post:{instance.pk}']
+    tags += scope_tags(old_group_id, old_author_id)
+    tags += scope_tags(instance.group_id, instance.author_id)
+    if old_group_id != instance.group_id:
+        change_group_count(old_group_id, -1)
+        change_group_count(instance.group_id, 1)
+    if old_author_id != instance.author_id:
+        change_author_count(old_author_id, -1)
+        change_author_count(instance.author_id, 1)
+    if old_owners != (instance.group_id, instance.author_id):
+        tags += feed_tags(old_group_id, old_author_id)
+        tags += feed_tags(instance.group_id, instance.author_id)
+    purge_cache_tags(*tags)
+
+
+@receiver(pre_delete, sender=Post)
+def remember_post_terms(sender, instance, **kwargs):
+    """Postings are deleted by cascade; keep what they indexed."""
+    instance._indexed_terms = search.indexed_terms(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    change_author_count(instance.author_id, -1)
+    change_group_count(instance.group_id, -1)
+    timeline.remove(instance.pk)
+    terms = getattr(instance, '_indexed_terms', None)
+    if terms:
+        enqueue(tasks.forget_terms, terms=terms)
+    purge_cache_tags(
+        f'post:{instance.pk}',
+        *post_tags(instance.group_id, instance.author_id)
+    )
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def purge_group_pages(sender, instance, **kwargs):
+    purge_cache_tags(
+        f'group:{instance.pk}', f'group-feed:{instance.pk}',
+        f'scope:group:{instance.pk}', 'scope:names'
+    )
+
+
+@receiver(pre_save, sender=User)
+def remember_author_names(sender, instance, update_fields=None, **kwargs):
+    """Keep the stored names to tell a rename from any other save."""
+    instance._old_names = None
+    if instance._state.adding or (
+            update_fields is not None
+            and not set(NAME_FIELDS) & set(update_fields)):
+        return
+    instance._old_names = User.objects.filter(pk=instance.pk).values_list(
+        *NAME_FIELDS
+    ).first()
+
+
+@receiver(post_save, sender=User)
+def purge_author_pages(sender, instance, created, **kwargs):
+    """Pages show author names, so renames purge them.
+
+    Signups and saves of other fields leave 'scope:names', and with it
+    every ETag of the site, alone.
+    """
+    old_names = getattr(instance, '_old_names', None)
+    names = tuple(getattr(instance, field) for field in NAME_FIELDS)
+    if created or old_names is None or old_names == names:
+        return
+    purge_cache_tags(
+        f'author:{instance.pk}', f'scope:author:{instance.pk}',
+        'scope:names'
+    )
@@ -0,0 +1,54 @@
+"""Search index and thumbnail upkeep run by background workers, see
+tasks.queue.
+
+Tasks look at the current state of the post rather than at the change
+that queued them, so running one twice or after a later edit is harmless.
+"""
+import json
+
+from core.page_cache import purge_cache_tags
+from tasks.queue import task
+from . import search, thumbnails
+from .models import Post, Posting
+
+
+@task
+def index_new_posts(post_ids):
+    """Index the posts of `post_ids` that have no postings yet."""
+    indexed = Posting.objects.filter(post_id__in=post_ids).values('post_id')
+    search.index_posts(list(
+        Post.objects.filter(pk__in=post_ids).exclude(
+            pk__in=indexed
+        ).only('pk', 'text')
+    ))
+
+
+@task
+def reindex_post(post_id):
+    post = Post.objects.filter(pk=post_id).only('pk', 'text').first()
+    if post is not None:
+        search.reindex_post(post)
+
+
+@task
+def forget_terms(terms):
+    """Update document counts after a post with `terms` was deleted."""
+    search.forget_terms(terms)
+
+
+@task
+def make_thumbnails(post_id):
+    """Generate every thumbnail size of the current image of a post."""
+    post = Post.objects.filter(pk=post_id).only(
+        'pk', 'image', 'group_id', 'author_id'
+    ).first()
+    if post is None or not post.image:
+        return
+    from .signals import post_tags
+    generated = json.dumps(thumbnails.generate(post.image))
+    # A newer upload resets the column and queues its own task.
+    if Post.objects.filter(pk=post_id, image=post.image.name).update(
+            thumbnails=generated):
+        purge_cache_tags(
+            f'post:{post.pk}', *post_tags(post.group_id, post.author_id)
+        )
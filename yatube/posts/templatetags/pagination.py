@@ -0,0 +1,24 @@
+from django import template
+
+from ..paginators import elided_page_range as _elided_page_range
+
+register = template.Library()
+
+PAGE_PARAMS = ('page', 'after', 'before')
+
+
+@register.simple_tag(takes_context=True)
+def page_url(context, **params):
+    """Current query string with the page position replaced by params."""
+    query = context['request'].GET.copy()
+    for key in PAGE_PARAMS:
+        query.pop(key, None)
+    for key, value in params.items():
+        query[key] = value
+    return '?' + query.urlencode()
+
+
+@register.simple_tag
+def elided_page_range(page_obj):
+    """Bounded list of page numbers and gaps around the current page."""
+    return _elided_page_range(page_obj.paginator.num_pages, page_obj.number)
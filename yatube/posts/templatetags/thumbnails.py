@@ -0,0 +1,15 @@
+from django import template
+
+from ..thumbnails import thumbnail
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/post_image.html')
+def post_image(post, size):
+    """Lazy <img> of a post thumbnail with its dimensions, if any."""
+    image = thumbnail(post, size)
+    if image is None:
+        return {'image': None}
+    url, width, height = image
+    return {'image': {'url': url, 'width': width, 'height': height}}
@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+from .. import timeline
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+def seed_feed(authors=12, groups=6, posts_per_author=3):
+    """Posts of many authors spread over many groups, newest first.
+
+    Every page of a feed shows posts of different authors and groups, so
+    a query per post shows up as a query count that grows with the page.
+    The index timeline is built, as it is on a running site.
+    """
+    User.objects.bulk_create([
+        User(username=f'author{number}', first_name=f'Автор {number}')
+        for number in range(authors)
+    ])
+    Group.objects.bulk_create([
+        Group(title=f'Группа {number}', slug=f'group{number}')
+        for number in range(groups)
+    ])
+    users = list(User.objects.filter(username__startswith='author'))
+    group_list = list(Group.objects.filter(slug__startswith='group'))
+    Post.objects.bulk_create([
+        Post(
+            text=f'Пост {number} автора {author.username}',
+            author=author,
+            group=group_list[(index + number) % len(group_list)],
+        )
+        for number in range(posts_per_author)
+        for index, author in enumerate(users)
+    ])
+    timeline.rebuild()
+    return users, group_list
+
+
+def format_queries(queries):
+    return '\n'.join(
+        f'{number}. {query["sql"]}'
+        for number, query in enumerate(queries, start=1)
+    )
+
+
+def count_queries(client, path, method='get', data=None):
+    """Run a cold request and return (response, captured queries)."""
+    cache.clear()
+    with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as captured:
+        response = getattr(client, method)(path, data)
+    return response, captured.captured_queries
+
+
+class QueryBudgetMixin:
+    """assertQueryBudget for TestCase, failing with the offending SQL."""
+
+    def assertQueryBudget(self, budget, path, method='get', data=None,
+                          client=None):
+        response, queries = count_queries(
+            client or self.client, path, method, data
+        )
+        if len(queries) > budget:
+            self.fail(
+                f'{method.upper()} {path}: {len(queries)} запросов при '
+                f'бюджете {budget}:\n{format_queries(queries)}'
+            )
+        return response
@@ -0,0 +1,92 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='roman')
+        cls.other = User.objects.create_user(username='anna')
+        cls.group = Group.objects.create(title='История', slug='history')
+        Post.objects.bulk_create([
+            Post(text=f'Пост {i}', author=cls.user if i % 2 else cls.other,
+                 group=cls.group if i % 3 == 0 else None)
+            for i in range(25)
+        ])
+        cls.ids = list(Post.objects.values_list('pk', flat=True))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_list_walks_all_pages(self):
+        """Курсорные страницы API проходят ленту без повторов."""
+        url = reverse('posts:api_post_list')
+        seen = []
+        params = {'limit': 10, 'fields': 'id'}
+        while True:
+            data = self.client.get(url, params).json()
+            seen += [item['id'] for item in data['results']]
+            self.assertEqual(set(data['results'][0]), {'id'})
+            if data['next'] is None:
+                break
+            params['after'] = data['next']
+        self.assertEqual(seen, self.ids)
+        data = self.client.get(url, {'before': params['after']}).json()
+        self.assertEqual(
+            [item['id'] for item in data['results']], self.ids[:19]
+        )
+        self.assertIsNone(data['previous'])
+
+    def test_scoped_feeds_and_detail(self):
+        """Ленты группы и автора, отдельный пост и 404 в JSON."""
+        response = self.client.get(
+            reverse('posts:api_group_posts', args=('history',))
+        )
+        self.assertEqual(len(response.json()['results']), 9)
+        response = self.client.get(
+            reverse('posts:api_author_posts', args=('roman',)),
+            {'fields': 'author,group'}
+        )
+        results = response.json()['results']
+        self.assertEqual(len(results), 12)
+        self.assertEqual(results[0], {'author': 'roman', 'group': None})
+        post = Post.objects.filter(group=self.group).first()
+        response = self.client.get(
+            reverse('posts:api_post_detail', args=(post.pk,))
+        )
+        self.assertEqual(response.json()['group'], 'history')
+        self.assertEqual(response.json()['text'], post.text)
+        for url in (
+            reverse('posts:api_post_detail', args=(0,)),
+            reverse('posts:api_group_posts', args=('nothing',)),
+            reverse('posts:api_author_posts', args=('nobody',)),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 404)
+                self.assertIn('error', response.json())
+
+    def test_batch_ids(self):
+        """?ids= отдает посты в порядке запроса одним запросом к БД."""
+        url = reverse('posts:api_post_list')
+        ids = [self.ids[3], 0, self.ids[1], self.ids[3]]
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {
+                'ids': ','.join(map(str, ids)), 'fields': 'id,text'
+            })
+        self.assertEqual(
+            [item['id'] for item in response.json()['results']],
+            [self.ids[3], self.ids[1]]
+        )
+        self.assertEqual(self.client.get(url, {'ids': 'a'}).status_code, 400)
+        response = self.client.get(url, {'fields': 'password'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,410 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..management.commands.bench_views import (
+    Command as BenchViewsCommand
+)
+from ..models import AuthorStat, Group, ImportCheckpoint, Post
+
+User = get_user_model()
+
+
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='roman')
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def test_import_jsonl(self):
+        """Импорт JSONL создает посты и группы, брак уходит в rejects."""
+        rows = [
+            {'text': 'Старый пост', 'author': 'roman', 'group': 'history',
+             'pub_date': '2015-03-01T10:00:00'},
+            {'text': 'Еще пост', 'author': 'roman'},
+            {'text': 'Чужой пост', 'author': 'nobody'},
+            {'text': '', 'author': 'roman'},
+        ]
+        lines = [json.dumps(row, ensure_ascii=False) for row in rows]
+        lines.insert(2, '{не json')
+        path = self.write('posts.jsonl', '\n'.join(lines) + '\n')
+        call_command('import_posts', path, batch_size=2, stdout=StringIO())
+        old = Post.objects.get(text='Старый пост')
+        self.assertEqual(old.pub_date.year, 2015)
+        self.assertEqual(old.group.slug, 'history')
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(AuthorStat.count_for(self.user), 2)
+        self.assertEqual(Group.objects.get(slug='history').posts_count, 1)
+        with open(f'{path}.rejects', encoding='utf-8') as rejects:
+            lines = [json.loads(line)['line'] for line in rejects]
+        self.assertEqual(sorted(lines), [3, 4, 5])
+        self.assertEqual(ImportCheckpoint.objects.get(name=path).rows, 5)
+        self.assertTrue(Post._meta.get_field('pub_date').auto_now_add)
+
+    def test_resume_from_checkpoint(self):
+        """Повторный запуск продолжает с контрольной точки."""
+        path = self.write('posts.csv', (
+            'text,author,group,pub_date\n'
+            'Первый,roman,,\n'
+            'Второй,roman,,\n'
+            'Третий,roman,,\n'
+        ))
+        ImportCheckpoint.objects.create(name=path, rows=2)
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(
+            list(Post.objects.values_list('text', flat=True)), ['Третий']
+        )
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_crash_before_commit_replays_batch_once(self):
+        """Сбой до коммита пачки не дублирует посты и брак при повторе."""
+        path = self.write('posts.csv', (
+            'text,author,group,pub_date\n'
+            'Первый,roman,,\n'
+            'Второй,roman,,\n'
+            ',roman,,\n'
+            'Четвертый,roman,,\n'
+        ))
+        save = ImportCheckpoint.objects.update_or_create
+        calls = []
+
+        def crash_on_second_batch(**kwargs):
+            calls.append(kwargs)
+            if len(calls) == 2:
+                raise RuntimeError('сбой')
+            return save(**kwargs)
+
+        with mock.patch.object(
+                ImportCheckpoint.objects, 'update_or_create',
+                crash_on_second_batch), self.assertRaises(RuntimeError):
+            call_command(
+                'import_posts', path, batch_size=2, stdout=StringIO()
+            )
+        self.assertEqual(Post.objects.count(), 2)
+        call_command('import_posts', path, batch_size=2, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 3)
+        with open(f'{path}.rejects', encoding='utf-8') as rejects:
+            self.assertEqual(
+                [json.loads(line)['line'] for line in rejects], [3]
+            )
+
+
+class ExportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='roman')
+        cls.staff = User.objects.create_user(username='admin', is_staff=True)
+        cls.group = Group.objects.create(title='История', slug='history')
+        Post.objects.bulk_create([
+            Post(text=f'Пост {i}', author=cls.user,
+                 group=cls.group if i % 2 else None)
+            for i in range(5)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'posts.jsonl')
+
+    def export(self, **options):
+        stderr = StringIO()
+        call_command(
+            'export_posts', output=self.path, chunk_size=2,
+            stderr=stderr, **options
+        )
+        opener = gzip.open if options.get('gzip') else open
+        with opener(self.path, 'rt', encoding='utf-8') as file:
+            rows = [json.loads(line) for line in file]
+        return rows, stderr.getvalue().split()[-1]
+
+    def test_export_and_continue(self):
+        """Выгрузка идет от старых к новым, токен продолжает ее."""
+        rows, since = self.export()
+        self.assertEqual(
+            [row['id'] for row in rows],
+            list(Post.objects.order_by('pub_date', 'pk')
+                 .values_list('pk', flat=True))
+        )
+        self.assertEqual(rows[1]['group'], 'history')
+        self.assertEqual(rows[0]['author'], 'roman')
+        self.assertEqual(self.export(since=since)[0], [])
+        Post.objects.create(text='Новый пост', author=self.user)
+        rows, _ = self.export(since=since, gzip=True)
+        self.assertEqual([row['text'] for row in rows], ['Новый пост'])
+
+    def test_endpoint_is_staff_only(self):
+        """Потоковая выгрузка доступна только персоналу."""
+        url = reverse('posts:export_posts')
+        client = self.client
+        client.force_login(self.user)
+        self.assertEqual(client.get(url).status_code, 302)
+        client.force_login(self.staff)
+        response = client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(len(body.splitlines()), 5)
+        response = client.get(url, {'since': 'вчера'})
+        self.assertEqual(response.status_code, 400)
+
+
+class TemplateCommandsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='roman')
+        cls.group = Group.objects.create(title='История', slug='history')
+        Post.objects.create(text='Пост', author=cls.user, group=cls.group)
+
+    def test_warm_templates(self):
+        """warm_templates компилирует все шаблоны проекта."""
+        stdout = StringIO()
+        call_command('warm_templates', stdout=stdout)
+        self.assertIn('Скомпилировано шаблонов', stdout.getvalue())
+
+    def test_bench_templates(self):
+        """bench_templates печатает холодное и теплое время рендера."""
+        stdout = StringIO()
+        call_command('bench_templates', iterations=2, stdout=stdout)
+        output = stdout.getvalue()
+        for name in ('index', 'profile', 'group_list'):
+            self.assertIn(f'posts/{name}.html', output)
+
+
+class BenchViewsTest(TestCase):
+    def write_results(self, directory, name, p95, queries=3):
+        path = os.path.join(directory, name)
+        with open(path, 'w') as file:
+            json.dump({'results': {'100': {'posts:index': {
+                'p95_ms': p95, 'queries': queries,
+            }}}}, file)
+        return path
+
+    def test_bench_views(self):
+        """bench_views замеряет каждый URL и не оставляет данных."""
+        posts = Post.objects.count()
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'bench.json')
+            call_command(
+                'bench_views', sizes='5', iterations=2, output=output,
+                stdout=StringIO(), stderr=StringIO()
+            )
+            with open(output) as file:
+                results = json.load(file)['results']['5']
+        for name in ('posts:index', 'posts:post_detail', 'about:tech',
+                     'users:login', 'posts:api_post_list'):
+            with self.subTest(name=name):
+                self.assertEqual(results[name]['status'], 200)
+                self.assertGreater(results[name]['queries'], 0)
+                self.assertGreater(results[name]['alloc_kb'], 0)
+        self.assertLessEqual(
+            results['posts:index']['p50_ms'],
+            results['posts:index']['p99_ms']
+        )
+        self.assertEqual(Post.objects.count(), posts)
+
+    def test_requests_keep_connection(self):
+        """Запросы замера не закрывают соединение внутри транзакции."""
+        command = BenchViewsCommand()
+        client = Client()
+        client.force_login(
+            User.objects.create_user(username='admin', is_staff=True)
+        )
+        with transaction.atomic(), \
+                mock.patch.object(connection, 'close') as close:
+            for name in ('posts:index', 'posts:export_posts'):
+                command.request(client, reverse(name))
+        close.assert_not_called()
+
+    def test_compare(self):
+        """Сравнение падает, если p95 или число запросов выросли."""
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = self.write_results(directory, 'base.json', 10)
+            same = self.write_results(directory, 'same.json', 10.5)
+            slower = self.write_results(directory, 'slow.json', 20)
+            chattier = self.write_results(
+                directory, 'queries.json', 10, queries=13
+            )
+            call_command(
+                'bench_views', compare=(baseline, same), stdout=StringIO()
+            )
+            for current in (slower, chattier):
+                with self.subTest(current=current), \
+                        self.assertRaises(CommandError):
+                    call_command(
+                        'bench_views', compare=(baseline, current),
+                        stdout=StringIO()
+                    )
+
+
+class SeedTest(TestCase):
+    OPTIONS = {
+        'users': 30, 'groups': 6, 'posts': 600, 'years': 2,
+        'until': '2024-01-01', 'batch_size': 200, 'workers': 1,
+    }
+
+    def seed(self, **options):
+        call_command('seed', stdout=StringIO(), **{**self.OPTIONS, **options})
+
+    def test_seed(self):
+        """seed создает посты с перекосом по авторам и верными счетчиками."""
+        self.seed()
+        posts = Post.objects.filter(author__username__startswith='user')
+        self.assertEqual(posts.count(), 600)
+        self.assertEqual(
+            AuthorStat.objects.aggregate(total=Sum('posts_count'))['total'],
+            600
+        )
+        self.assertEqual(
+            Group.objects.aggregate(total=Sum('posts_count'))['total'],
+            posts.filter(group__isnull=False).count()
+        )
+        busiest = posts.values('author').annotate(
+            count=Count('pk')
+        ).order_by('-count').first()['count']
+        self.assertGreater(busiest, 3 * 600 / 30)
+        dates = sorted(posts.values_list('pub_date', flat=True))
+        self.assertLess(dates[-1].year, 2024)
+        self.assertLessEqual((dates[-1] - dates[0]).days, 2 * 366)
+        self.assertEqual(
+            self.client.get(reverse('posts:index')).status_code, 200
+        )
+
+    def snapshot(self, **options):
+        with transaction.atomic():
+            self.seed(**options)
+            rows = list(Post.objects.order_by('pk').values_list(
+                'text', 'pub_date', 'author__username', 'group__slug'
+            ))
+            transaction.set_rollback(True)
+        return rows
+
+    def test_deterministic(self):
+        """Данные зависят от seed, но не от числа процессов."""
+        first = self.snapshot()
+        self.assertEqual(self.snapshot(workers=2), first)
+        self.assertNotEqual(self.snapshot(seed=2), first)
+
+
+class SqlitePragmasTest(TestCase):
+    def test_pragmas_applied(self):
+        """Соединение получает профиль PRAGMAS из DATABASES."""
+        if connection.vendor != 'sqlite':
+            self.skipTest('Только для SQLite.')
+        expected = {'temp_store': 2, 'busy_timeout': 5000, 'synchronous': 1}
+        with connection.cursor() as cursor:
+            for pragma, value in expected.items():
+                with self.subTest(pragma=pragma):
+                    cursor.execute(f'PRAGMA {pragma}')
+                    self.assertEqual(cursor.fetchone()[0], value)
+
+
+class StaticFilesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.settings = override_settings(
+            STATIC_ROOT=cls.static_root,
+            STATICFILES_STORAGE=(
+                'core.static.CompressedManifestStaticFilesStorage'
+            ),
+            MIDDLEWARE=['core.static.StaticFilesMiddleware',
+                        'core.static.MediaFilesMiddleware',
+                        *settings.MIDDLEWARE],
+            MEDIA_ROOT=os.path.join(cls.static_root, 'media'),
+            DEBUG=False,
+        )
+        cls.settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(cls.static_root, 'staticfiles.json')) as file:
+            cls.css = json.load(file)['paths']['css/bootstrap.min.css']
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.static_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, name, **headers):
+        response = self.client.get(settings.STATIC_URL + name, **headers)
+        content = b''.join(response.streaming_content)
+        response.close()
+        return response, content
+
+    def test_pages_link_hashed_names(self):
+        """Страницы ссылаются на файлы с хешем содержимого в имени."""
+        self.assertNotEqual(self.css, 'css/bootstrap.min.css')
+        self.assertContains(self.client.get(reverse('posts:index')), self.css)
+
+    def test_compressed_variant(self):
+        """Клиенту с gzip отдается заранее сжатый вариант навсегда."""
+        response, content = self.get(
+            self.css, HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(int(response['Content-Length']), len(content))
+        with open(os.path.join(self.static_root, self.css), 'rb') as file:
+            self.assertEqual(gzip.decompress(content), file.read())
+
+    def test_identity_and_unhashed_names(self):
+        """Без gzip отдается оригинал, имя без хеша кешируется ненадолго."""
+        response, content = self.get(
+            self.css, HTTP_ACCEPT_ENCODING='gzip;q=0'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertTrue(content.startswith(b'@charset'))
+        response, _ = self.get('css/bootstrap.min.css')
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertEqual(self.client.get(
+            settings.STATIC_URL + 'css/missing.css'
+        ).status_code, 404)
+
+    def test_media_served_without_debug(self):
+        """Загруженные файлы отдаются и с DEBUG = False."""
+        os.makedirs(os.path.join(settings.MEDIA_ROOT, 'posts'))
+        with open(os.path.join(settings.MEDIA_ROOT, 'posts', 'a.gif'),
+                  'wb') as file:
+            file.write(b'GIF89a')
+        response = self.client.get(settings.MEDIA_URL + 'posts/a.gif')
+        self.assertEqual(b''.join(response.streaming_content), b'GIF89a')
+        self.assertEqual(response['Content-Type'], 'image/gif')
+        response.close()
+        for name in ('posts/missing.gif', '../staticfiles.json'):
+            with self.subTest(name=name):
+                self.assertIn(self.client.get(
+                    settings.MEDIA_URL + name
+                ).status_code, (400, 404))
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class FeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='roman')
+        cls.group = Group.objects.create(
+            title='История', slug='history', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Пост в группе', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds(self):
+        """Ленты отдаются в RSS и Atom с записями владельца."""
+        urls = {
+            reverse('posts:index_rss'): 'application/rss+xml',
+            reverse('posts:index_atom'): 'application/atom+xml',
+            reverse('posts:group_rss', args=('history',)):
+                'application/rss+xml',
+            reverse('posts:group_atom', args=('history',)):
+                'application/atom+xml',
+            reverse('posts:author_rss', args=('roman',)):
+                'application/rss+xml',
+            reverse('posts:author_atom', args=('roman',)):
+                'application/atom+xml',
+        }
+        for url, content_type in urls.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response['Content-Type'].startswith(
+                    content_type
+                ))
+                self.assertContains(response, 'Пост в группе')
+                self.assertTrue(response.has_header('ETag'))
+                self.assertTrue(response.has_header('Last-Modified'))
+        response = self.client.get(
+            reverse('posts:group_rss', args=('nothing',))
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_unchanged_feed_is_not_modified(self):
+        """Повторный опрос без изменений получает 304 без запросов постов."""
+        url = reverse('posts:group_rss', args=('history',))
+        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            cached = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(cached.status_code, 304)
+        url = reverse('posts:index_rss')
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            cached = self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+        self.assertEqual(cached.status_code, 304)
+
+    def test_changes_refresh_feed(self):
+        """Новые и отредактированные записи меняют ETag ленты."""
+        url = reverse('posts:author_atom', args=('roman',))
+        etag = self.client.get(url)['ETag']
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Исправленный пост')
+        etag = response['ETag']
+        Post.objects.create(text='Новый пост', author=self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Новый пост')
@@ -1,10 +1,20 @@
+import json
+import shutil
+import tempfile
+from io import BytesIO
+
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
 from http import HTTPStatus
+from PIL import Image
 
+from tasks.models import Task
 from ..forms import PostForm
 from ..models import Post, Group
-from django.test import TestCase, Client
+from ..tasks import make_thumbnails
+from ..thumbnails import thumbnail
+from django.test import TestCase, Client, override_settings
 
 User = get_user_model()
 
@@ -96,3 +106,80 @@ class FormTest(TestCase):
         )
         self.assertFormError(response, 'form', 'text', 'Обязательное поле.')
         self.assertEqual(response.status_code, HTTPStatus.OK, 'Сервер упал')
+
+
+def uploaded_image(name='photo.png', size=(480, 240)):
+    content = BytesIO()
+    Image.new('RGB', size, 'teal').save(content, 'PNG')
+    return SimpleUploadedFile(name, content.getvalue(), 'image/png')
+
+
+class PostImageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media.enable()
+        cls.user = User.objects.create_user(username='painter')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_upload_makes_every_thumbnail(self):
+        """Все размеры миниатюр готовы сразу после загрузки."""
+        self.client.post(reverse('posts:post_create'), data={
+            'text': 'С картинкой', 'image': uploaded_image(),
+        })
+        post = Post.objects.get(text='С картинкой')
+        self.assertEqual((post.image_width, post.image_height), (480, 240))
+        stored = json.loads(post.thumbnails)
+        self.assertEqual(stored['feed'][1:], [960, 339])
+        self.assertEqual(stored['detail'][1:], [480, 240])
+        for page in (reverse('posts:index'),
+                     reverse('posts:post_detail', args=(post.pk,))):
+            with self.subTest(page=page):
+                content = self.client.get(page).content.decode()
+                self.assertIn('loading="lazy"', content)
+                self.assertNotIn(post.image.url, content)
+        self.assertIn(
+            f'src="{stored["feed"][0]}" width="960" height="339"',
+            self.client.get(reverse('posts:index')).content.decode()
+        )
+
+    @override_settings(TASKS_ALWAYS_EAGER=False)
+    def test_original_shown_until_thumbnails_are_made(self):
+        """До фоновой задачи показывается оригинал в размерах миниатюры."""
+        post = Post.objects.create(
+            text='Ждет миниатюр', author=self.user, image=uploaded_image()
+        )
+        task = Task.objects.get(name=make_thumbnails.task_name)
+        self.assertEqual(json.loads(task.kwargs), {'post_id': post.pk})
+        self.assertEqual(
+            thumbnail(post, 'detail'), (post.image.url, 480, 240)
+        )
+        make_thumbnails(post_id=post.pk)
+        post.refresh_from_db()
+        self.assertNotEqual(thumbnail(post, 'feed')[0], post.image.url)
+
+    def test_new_image_replaces_thumbnails(self):
+        """Новая картинка заменяет миниатюры старой."""
+        post = Post.objects.create(
+            text='Старая картинка', author=self.user, image=uploaded_image()
+        )
+        old = json.loads(Post.objects.get(pk=post.pk).thumbnails)
+        self.client.post(
+            reverse('posts:post_edit', args=(post.pk,)),
+            data={'text': post.text,
+                  'image': uploaded_image('new.png', (300, 600))}
+        )
+        post.refresh_from_db()
+        new = json.loads(post.thumbnails)
+        self.assertNotEqual(new['feed'][0], old['feed'][0])
+        self.assertEqual(new['detail'][1:], [300, 600])
@@ -1,6 +1,12 @@
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models.query import QuerySet
 from django.test import TestCase
-from ..models import Post, Group
+from ..counters import change_author_count
+from ..models import AuthorStat, Post, Group
 
 User = get_user_model()
 
@@ -81,3 +87,71 @@ class PostModelTest(TestCase):
                     post._meta.get_field(field).help_text,
                     expected
                 )
+
+
+class PostCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Roman')
+        cls.group = Group.objects.create(title='Группа', slug='first')
+        cls.another_group = Group.objects.create(
+            title='Другая группа', slug='second'
+        )
+
+    def assertCounters(self, group, another_group, author):
+        self.group.refresh_from_db()
+        self.another_group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, group)
+        self.assertEqual(self.another_group.posts_count, another_group)
+        self.assertEqual(AuthorStat.count_for(self.user), author)
+
+    def test_counters_follow_posts(self):
+        """Счетчики меняются при создании, смене группы и удалении."""
+        post = Post.objects.create(
+            author=self.user, text='Пост', group=self.group
+        )
+        Post.objects.create(author=self.user, text='Без группы')
+        self.assertCounters(1, 0, 2)
+        post.group = self.another_group
+        post.save()
+        self.assertCounters(0, 1, 2)
+        post.delete()
+        self.assertCounters(0, 0, 1)
+
+    def test_bulk_create_counters(self):
+        """bulk_create тоже обновляет счетчики."""
+        Post.objects.bulk_create([
+            Post(author=self.user, text=f'Пост {i}', group=self.group)
+            for i in range(3)
+        ])
+        self.assertCounters(3, 0, 3)
+
+    def test_concurrent_first_posts(self):
+        """Первые посты автора в двух транзакциях не падают."""
+        update = QuerySet.update
+        raced = []
+
+        def racing_update(queryset, **kwargs):
+            if raced or queryset.model is not AuthorStat:
+                return update(queryset, **kwargs)
+            # The other transaction commits its first post in between.
+            raced.append(True)
+            AuthorStat.objects.create(author=self.user, posts_count=1)
+            return 0
+
+        with mock.patch.object(QuerySet, 'update', racing_update):
+            change_author_count(self.user.pk, 1)
+        self.assertEqual(AuthorStat.count_for(self.user), 2)
+
+    def test_recount_command(self):
+        """Команда recount_posts исправляет рассинхронизацию."""
+        Post.objects.bulk_create([
+            Post(author=self.user, text=f'Пост {i}', group=self.group)
+            for i in range(3)
+        ])
+        Group.objects.update(posts_count=7)
+        AuthorStat.objects.all().delete()
+        self.assertCounters(7, 7, 0)
+        call_command('recount_posts', stdout=StringIO())
+        self.assertCounters(3, 0, 3)
@@ -0,0 +1,143 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post, Group
+from ..paginators import (
+    CursorPaginator, ELLIPSIS, decode_cursor, elided_page_range, encode_cursor
+)
+
+User = get_user_model()
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='roman')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug'
+        )
+        Post.objects.bulk_create([
+            Post(text=f'Пост {i}', group=cls.group, author=cls.user)
+            for i in range(25)
+        ])
+        cls.expected = list(Post.objects.order_by('-pub_date', '-id'))
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_cursor_roundtrip(self):
+        """Курсор кодируется и декодируется без потерь."""
+        post = self.expected[0]
+        self.assertEqual(
+            decode_cursor(encode_cursor(post)), (post.pub_date, post.pk)
+        )
+        self.assertIsNone(decode_cursor('мусор'))
+
+    def test_pages_forward_and_back(self):
+        """Переход вперед и назад по курсорам повторяет порядок ленты."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        first = paginator.cursor_page()
+        second = paginator.cursor_page(after=first.next_cursor)
+        third = paginator.cursor_page(after=second.next_cursor)
+        self.assertEqual(list(first), self.expected[:10])
+        self.assertEqual(list(second), self.expected[10:20])
+        self.assertEqual(list(third), self.expected[20:])
+        self.assertFalse(first.has_previous())
+        self.assertFalse(third.has_next())
+        back = paginator.cursor_page(before=third.previous_cursor)
+        self.assertEqual(list(back), self.expected[10:20])
+        self.assertTrue(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_before_newest_post(self):
+        """Перед самым новым постом пустая страница без ссылок дальше."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        page = paginator.cursor_page(before=encode_cursor(self.expected[0]))
+        self.assertEqual(list(page), [])
+        self.assertFalse(page.has_next())
+        self.assertIsNone(page.next_cursor)
+        response = self.guest_client.get(
+            reverse('posts:index'), {'before': encode_cursor(self.expected[0])}
+        )
+        self.assertNotContains(response, 'after=None')
+
+    def test_views_accept_cursor(self):
+        """Главная, группа и профиль понимают ?after=."""
+        token = encode_cursor(self.expected[9])
+        addresses = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username})
+        )
+        for address in addresses:
+            with self.subTest(address=address):
+                response = self.guest_client.get(address, {'after': token})
+                page_obj = response.context['page_obj']
+                self.assertTrue(page_obj.is_cursor)
+                self.assertEqual(list(page_obj), self.expected[10:20])
+                self.assertContains(
+                    response, f'?after={page_obj.next_cursor}'
+                )
+
+    def test_page_numbers_stop_at_limit(self):
+        """Номера страниц большой ленты ограничены PAGE_NUMBER_LIMIT."""
+        address = reverse('posts:index')
+        with mock.patch('posts.views.PAGE_NUMBER_LIMIT', 2):
+            response = self.guest_client.get(address, {'page': 2})
+            self.assertEqual(
+                list(response.context['page_obj']), self.expected[10:20]
+            )
+            self.assertNotContains(response, '?page=3"')
+            for page in (3, 0, 'мусор'):
+                with self.subTest(page=page):
+                    response = self.guest_client.get(address, {'page': page})
+                    self.assertEqual(response.status_code, 404)
+
+    def test_feed_plans_use_indexes(self):
+        """Запросы лент читают индексы без сортировки во временном дереве."""
+        out = StringIO()
+        call_command('feed_explain', stdout=out)
+        self.assertIn('post_group_feed_idx', out.getvalue())
+
+
+class ElidedPageRangeTest(TestCase):
+    def test_small_range_is_complete(self):
+        """Для небольшого числа страниц выводятся все номера."""
+        self.assertEqual(elided_page_range(5, 3), [1, 2, 3, 4, 5])
+
+    def test_window_is_bounded(self):
+        """Навигатор содержит края, окно вокруг текущей и пропуски."""
+        self.assertEqual(
+            elided_page_range(10000, 5000),
+            [1, ELLIPSIS, 4998, 4999, 5000, 5001, 5002, ELLIPSIS, 10000]
+        )
+        self.assertEqual(
+            elided_page_range(10000, 2), [1, 2, 3, 4, ELLIPSIS, 10000]
+        )
+        self.assertEqual(
+            elided_page_range(10000, 9999),
+            [1, ELLIPSIS, 9997, 9998, 9999, 10000]
+        )
+
+    def test_rendered_links(self):
+        """Шаблон паджинатора выводит ограниченный набор ссылок."""
+        user = User.objects.create_user(username='roman')
+        Post.objects.bulk_create([
+            Post(text=f'Пост {i}', author=user) for i in range(195)
+        ])
+        response = Client().get(reverse('posts:index'), {'page': 10})
+        content = response.content.decode()
+        for page in (1, 8, 9, 11, 12, 20):
+            with self.subTest(page=page):
+                self.assertIn(f'?page={page}"', content)
+        for page in (2, 7, 13, 19):
+            with self.subTest(page=page):
+                self.assertNotIn(f'?page={page}"', content)
+        self.assertEqual(content.count(ELLIPSIS), 2)
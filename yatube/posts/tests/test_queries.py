@@ -0,0 +1,81 @@
+from unittest import mock
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post
+from ..views import P_COUNT
+from .mixins import QueryBudgetMixin, seed_feed
+
+# Queries of a cold request by an authorized user: session, user and the
+# page itself. Anonymous visitors need two queries less.
+BUDGETS = {
+    'index': 5,
+    'group_list': 4,
+    'profile': 5,
+    'post_detail': 7,
+    'post_create': 3,
+    'post_edit': 4,
+}
+# Saving runs the counters, the search index, the timeline ring and the
+# session update.
+POST_BUDGETS = {
+    'post_create': 20,
+    'post_edit': 23,
+}
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.authors, cls.groups = seed_feed(
+            authors=P_COUNT + 2, groups=P_COUNT // 2
+        )
+        cls.author = cls.authors[0]
+        cls.post = Post.objects.filter(author=cls.author).first()
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def urls(self):
+        return {
+            'index': reverse('posts:index'),
+            'group_list': reverse(
+                'posts:group_list', args=(self.groups[0].slug,)
+            ),
+            'profile': reverse(
+                'posts:profile', args=(self.authors[1].username,)
+            ),
+            'post_detail': reverse('posts:post_detail', args=(self.post.pk,)),
+            'post_create': reverse('posts:post_create'),
+            'post_edit': reverse('posts:post_edit', args=(self.post.pk,)),
+        }
+
+    def test_pages_within_budget(self):
+        """Страницы укладываются в бюджет запросов при любом размере."""
+        for size in (2, P_COUNT, P_COUNT * 2):
+            with mock.patch('posts.views.P_COUNT', size):
+                for name, url in self.urls().items():
+                    with self.subTest(page=name, size=size):
+                        self.assertQueryBudget(BUDGETS[name], url)
+
+    def test_anonymous_pages_within_budget(self):
+        """Гостю страницы лент обходятся без сессии и пользователя."""
+        guest = Client()
+        for name, url in self.urls().items():
+            if name in ('post_create', 'post_edit'):
+                continue
+            with self.subTest(page=name):
+                self.assertQueryBudget(BUDGETS[name] - 2, url, client=guest)
+
+    def test_saving_within_budget(self):
+        """Создание и правка поста укладываются в бюджет запросов."""
+        urls = self.urls()
+        data = {'text': 'Новый текст', 'group': self.groups[1].pk}
+        for name, budget in POST_BUDGETS.items():
+            with self.subTest(page=name):
+                response = self.assertQueryBudget(
+                    budget, urls[name], method='post', data=data
+                )
+                self.assertEqual(response.status_code, 302)
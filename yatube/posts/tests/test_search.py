@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post, SearchTerm
+from ..search import SearchPaginator, terms
+from ..stemmer import stem
+
+User = get_user_model()
+
+
+class StemmerTest(TestCase):
+    def test_stems(self):
+        """Словоформы сводятся к одной основе."""
+        words = {
+            'кошки': 'кошк',
+            'котами': 'кот',
+            'красивая': 'красив',
+            'возможность': 'возможн',
+            'важнейший': 'важн',
+            'ёлками': 'елк',
+        }
+        for word, expected in words.items():
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), expected)
+
+    def test_stop_words_dropped(self):
+        """Служебные слова не попадают в индекс."""
+        self.assertEqual(terms('Кот и собака на диване'),
+                         ['кот', 'собак', 'диван'])
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_superuser(
+            username='roman', email='roman@example.com', password='pass'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.cat = Post.objects.create(
+            text='Коты любят спать. Кот спит весь день.', author=self.user
+        )
+        self.dog = Post.objects.create(
+            text='Собака и кошка спали вместе.', author=self.user
+        )
+
+    def test_search_page(self):
+        """Поиск находит посты по любой словоформе, лучшие выше."""
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': 'котов'}
+        )
+        self.assertEqual(list(response.context['page_obj']), [self.cat])
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': 'спать'}
+        )
+        self.assertEqual(list(response.context['page_obj']), [self.cat])
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': 'спали'}
+        )
+        self.assertEqual(list(response.context['page_obj']), [self.dog])
+
+    def test_index_follows_edit_and_delete(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        self.dog.text = 'Собака лает'
+        self.dog.save()
+        self.assertFalse(
+            list(SearchPaginator('кошка', 10).cursor_page())
+        )
+        self.assertEqual(
+            list(SearchPaginator('лает', 10).cursor_page()), [self.dog]
+        )
+        self.dog.delete()
+        self.assertEqual(SearchTerm.objects.get(term='лает').documents, 0)
+
+    def test_keyset_pages(self):
+        """Результаты поиска листаются курсором без потерь."""
+        Post.objects.bulk_create([
+            Post(text=f'Птица номер {i}' + ' птица' * i, author=self.user)
+            for i in range(25)
+        ])
+        paginator = SearchPaginator('птицы', 10)
+        first = paginator.cursor_page()
+        second = paginator.cursor_page(after=first.next_cursor)
+        third = paginator.cursor_page(after=second.next_cursor)
+        found = list(first) + list(second) + list(third)
+        self.assertEqual(len(set(found)), 25)
+        self.assertGreater(
+            found[0].search_score, found[-1].search_score
+        )
+        self.assertFalse(third.has_next())
+        back = paginator.cursor_page(before=third.previous_cursor)
+        self.assertEqual(list(back), list(second))
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идет через индекс."""
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'кошками'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.dog]
+        )
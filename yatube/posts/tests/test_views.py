@@ -1,7 +1,25 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
-from django.urls import reverse
-from ..models import Post, Group
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.contrib.sessions.backends.db import SessionStore
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from core.db_router import ReplicaRoutingMiddleware, STICKY_SESSION_KEY
+from core.metrics import registry
+from .. import views
+from ..models import Post, Group, TimelineRing
+from ..paginators import encode_cursor
+from ..timeline import RING_PK, get_timeline
 from django import forms
 
 User = get_user_model()
@@ -189,3 +207,464 @@ class PostTest(TestCase):
         for field, value in form_fields.items():
             with self.subTest(field=field):
                 self.assertEqual(field, value)
+
+
+class PostFragmentCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='roman', first_name='Роман', last_name='Бычин'
+        )
+        cls.group = Group.objects.create(title='Группа', slug='test_slug')
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Исходный текст', author=self.user, group=self.group
+        )
+        self.authorize_client = Client()
+        self.authorize_client.force_login(self.user)
+
+    def test_fragment_follows_post_edit(self):
+        """Кэш карточки поста сбрасывается при редактировании."""
+        self.authorize_client.get(reverse('posts:index'))
+        self.authorize_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Новый текст', 'group': self.group.pk}
+        )
+        response = self.authorize_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Новый текст')
+        self.assertNotContains(response, 'Исходный текст')
+
+    def test_fragment_follows_author_and_group(self):
+        """Кэш карточки сбрасывается при смене имени автора и группы."""
+        self.authorize_client.get(reverse('posts:index'))
+        self.user.first_name = 'Иван'
+        self.user.save()
+        self.group.title = 'Переименованная группа'
+        self.group.save()
+        response = self.authorize_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Иван Бычин')
+        self.assertContains(response, 'Переименованная группа')
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='roman')
+        cls.group = Group.objects.create(title='Группа', slug='test_slug')
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Первый пост', author=self.user, group=self.group
+        )
+        self.guest_client = Client()
+        self.authorize_client = Client()
+        self.authorize_client.force_login(self.user)
+
+    def test_guest_pages_are_cached(self):
+        """Повторный запрос гостя отдается из кэша."""
+        addresses = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for address in addresses:
+            with self.subTest(address=address):
+                self.guest_client.get(address)
+                response = self.guest_client.get(address)
+                self.assertEqual(response['X-Page-Cache'], 'hit')
+                self.assertContains(response, 'Первый пост')
+                response = self.authorize_client.get(address)
+                self.assertFalse(response.has_header('X-Page-Cache'))
+
+    def test_purge_only_affected_pages(self):
+        """Новый пост в группе сбрасывает ленты, но не чужую страницу."""
+        other = Group.objects.create(title='Другая', slug='other')
+        detail = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        other_url = reverse('posts:group_list', kwargs={'slug': other.slug})
+        for address in (reverse('posts:index'), detail, other_url):
+            self.guest_client.get(address)
+        Post.objects.create(
+            text='Второй пост', author=self.user, group=self.group
+        )
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Второй пост')
+        self.assertEqual(
+            self.guest_client.get(other_url)['X-Page-Cache'], 'hit'
+        )
+        # The detail page shows the author's post count.
+        self.assertFalse(
+            self.guest_client.get(detail).has_header('X-Page-Cache')
+        )
+
+    def test_write_during_render_is_not_cached(self):
+        """Пост, созданный во время отрисовки, не прячется за кэшем."""
+        render = views.render
+
+        def render_then_write(*args, **kwargs):
+            response = render(*args, **kwargs)
+            Post.objects.create(text='Второй пост', author=self.user)
+            return response
+
+        with mock.patch('posts.views.render', render_then_write):
+            self.guest_client.get(reverse('posts:index'))
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('X-Page-Cache'))
+        self.assertContains(response, 'Второй пост')
+
+    def test_group_rename_purges_pages(self):
+        """Переименование группы сбрасывает страницы с ее названием."""
+        self.guest_client.get(reverse('posts:index'))
+        self.group.title = 'Новое название'
+        self.group.save()
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Новое название')
+
+    def test_file_based_backend(self):
+        """Кэш страниц работает с файловым бэкендом."""
+        with tempfile.TemporaryDirectory() as location:
+            backend = {
+                'BACKEND': 'django.core.cache.backends.filebased.'
+                           'FileBasedCache',
+                'LOCATION': location,
+            }
+            with override_settings(CACHES={'default': backend}):
+                self.guest_client.get(reverse('posts:index'))
+                response = self.guest_client.get(reverse('posts:index'))
+                self.assertEqual(response['X-Page-Cache'], 'hit')
+                self.post.text = 'Измененный пост'
+                self.post.save()
+                response = self.guest_client.get(reverse('posts:index'))
+                self.assertContains(response, 'Измененный пост')
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='roman')
+
+    def setUp(self):
+        cache.clear()
+        self.authorize_client = Client()
+        self.authorize_client.force_login(self.user)
+
+    def test_ring_follows_posts(self):
+        """Лента главной пополняется при создании и удалении постов."""
+        first = Post.objects.create(text='Первый', author=self.user)
+        self.assertEqual(get_timeline().ids, [first.pk])
+        second = Post.objects.create(text='Второй', author=self.user)
+        self.assertEqual(get_timeline().ids, [second.pk, first.pk])
+        first.delete()
+        timeline = get_timeline()
+        self.assertEqual((timeline.ids, timeline.count), ([second.pk], 1))
+
+    def test_rolled_back_post_not_in_ring(self):
+        """Откаченный пост не попадает в ленту главной."""
+        post = Post.objects.create(text='Первый', author=self.user)
+        get_timeline()
+        with transaction.atomic():
+            Post.objects.create(text='Откаченный', author=self.user)
+            transaction.set_rollback(True)
+        timeline = get_timeline()
+        self.assertEqual((timeline.ids, timeline.count), ([post.pk], 1))
+
+    def test_big_index_served_from_ring(self):
+        """Страницы большой ленты внутри кэша не сортируют таблицу."""
+        posts = [
+            Post.objects.create(text=f'Пост {i}', author=self.user)
+            for i in range(25)
+        ][::-1]
+        TimelineRing.objects.filter(pk=RING_PK).update(
+            ids=json.dumps(get_timeline().ids[:15])
+        )
+        pages = []
+        with mock.patch('posts.views.PAGE_NUMBER_LIMIT', 1):
+            for params in ({}, {'after': encode_cursor(posts[9])},
+                           {'before': encode_cursor(posts[10])}):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.authorize_client.get(
+                        reverse('posts:index'), params
+                    )
+                pages.append((
+                    list(response.context['page_obj']),
+                    any('ORDER BY' in query['sql'] for query in queries),
+                ))
+        self.assertEqual(pages[0], (posts[:10], False))
+        # The second page reaches past the 15 ids of the ring.
+        self.assertEqual(pages[1], (posts[10:20], True))
+        self.assertEqual(pages[2], (posts[:10], False))
+
+    def test_index_served_from_ring(self):
+        """Главная берет посты из кэша ленты."""
+        posts = [
+            Post.objects.create(text=f'Пост {i}', author=self.user)
+            for i in range(12)
+        ]
+        get_timeline()
+        response = self.authorize_client.get(reverse('posts:index'))
+        self.assertEqual(
+            list(response.context['page_obj']), posts[::-1][:10]
+        )
+        self.assertEqual(response.context['count'], 12)
+
+    def test_rebuild_command(self):
+        """Команда rebuild_timeline восстанавливает ленту после сброса."""
+        post = Post.objects.create(text='Пост', author=self.user)
+        TimelineRing.objects.all().delete()
+        call_command('rebuild_timeline', stdout=StringIO())
+        self.assertEqual(
+            TimelineRing.objects.values_list('ids', 'posts_count').get(),
+            (json.dumps([post.pk]), 1)
+        )
+
+
+class PostDetailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='roman')
+        cls.group = Group.objects.create(title='Группа', slug='test_slug')
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {i}', author=cls.user,
+                group=cls.group if i != 1 else None
+            )
+            for i in range(4)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_neighbours(self):
+        """Ссылки на соседние посты автора и группы."""
+        response = self.guest_client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.posts[2].pk}
+        ))
+        self.assertEqual(response.context['author_neighbours'], {
+            'older': self.posts[1].pk, 'newer': self.posts[3].pk
+        })
+        self.assertEqual(response.context['group_neighbours'], {
+            'older': self.posts[0].pk, 'newer': self.posts[3].pk
+        })
+        self.assertEqual(response.context['count'], 4)
+
+    def test_query_budget(self):
+        """Страница поста: один запрос за постом и четыре за соседями."""
+        with self.assertNumQueries(5):
+            self.guest_client.get(reverse(
+                'posts:post_detail', kwargs={'post_id': self.posts[2].pk}
+            ))
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='roman')
+        cls.group = Group.objects.create(title='Группа', slug='test_slug')
+        cls.other_group = Group.objects.create(title='Другая', slug='other')
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.urls = {
+            'index': reverse('posts:index'),
+            'group': reverse('posts:group_list', args=('test_slug',)),
+            'other': reverse('posts:group_list', args=('other',)),
+            'profile': reverse('posts:profile', args=('roman',)),
+            'detail': reverse('posts:post_detail', args=(self.post.pk,)),
+        }
+
+    def etags(self, client=None):
+        client = client or self.guest_client
+        return {
+            name: client.get(url)['ETag'] for name, url in self.urls.items()
+        }
+
+    def test_not_modified_before_queries(self):
+        """Неизменная страница отвечает 304 без запросов ленты."""
+        queries = {'index': 0, 'group': 1, 'profile': 1, 'detail': 1}
+        for name, count in queries.items():
+            with self.subTest(page=name):
+                response = self.guest_client.get(self.urls[name])
+                with self.assertNumQueries(count):
+                    cached = self.guest_client.get(
+                        self.urls[name],
+                        HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(cached.status_code, 304)
+                cached = self.guest_client.get(
+                    self.urls[name],
+                    HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+                self.assertEqual(cached.status_code, 304)
+
+    def test_scope_versions(self):
+        """Правка и перенос поста меняют версии только его областей."""
+        etags = self.etags()
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        changed = self.etags()
+        self.assertEqual(changed['other'], etags['other'])
+        for name in ('index', 'group', 'profile', 'detail'):
+            self.assertNotEqual(changed[name], etags[name])
+        self.post.group = self.other_group
+        self.post.save()
+        moved = self.etags()
+        self.assertNotEqual(moved['other'], changed['other'])
+        self.assertNotEqual(moved['group'], changed['group'])
+
+    def test_only_renames_change_names_version(self):
+        """Регистрация и смена пароля не меняют версии страниц."""
+        etags = self.etags()
+        User.objects.create_user(username='newcomer')
+        self.user.set_password('new-password')
+        self.user.save()
+        self.assertEqual(self.etags(), etags)
+        self.user.first_name = 'Роман'
+        self.user.save()
+        renamed = self.etags()
+        for name in self.urls:
+            self.assertNotEqual(renamed[name], etags[name])
+
+    def test_logged_in_user(self):
+        """Версия страницы учитывает вошедшего пользователя."""
+        guest = self.etags()
+        authorized = self.etags(self.authorized_client)
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                self.assertNotEqual(guest[name], authorized[name])
+                response = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=guest[name]
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(response.has_header('Last-Modified'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica_test'])
+class ReplicaRoutingTest(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.session = SessionStore()
+
+    def route(self, method, url):
+        """Alias posts would be read from inside the view of `url`."""
+        request = getattr(self.factory, method)(url)
+        request.session = self.session
+        request.resolver_match = resolve(url)
+        seen = {}
+
+        def view(request):
+            seen['db'] = Post.objects.all().db
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(
+            lambda request: middleware.process_view(request, view, (), {})
+            or view(request)
+        )
+        middleware(request)
+        return seen['db']
+
+    def test_read_views_use_replica(self):
+        """Ленты читают из реплики, остальное и записи — из основной."""
+        self.assertEqual(self.route('get', reverse('posts:index')),
+                         'replica_test')
+        self.assertEqual(
+            self.route('get', reverse('about:tech')), 'replica_test'
+        )
+        self.assertEqual(
+            self.route('get', reverse('posts:post_create')), 'default'
+        )
+        self.assertEqual(Post.objects.all().db, 'default')
+
+    def test_read_your_writes(self):
+        """После записи сессия читает из основной базы."""
+        self.route('post', reverse('posts:post_create'))
+        self.assertEqual(self.route('get', reverse('posts:index')), 'default')
+        self.session[STICKY_SESSION_KEY] = 0
+        self.assertEqual(
+            self.route('get', reverse('posts:index')), 'replica_test'
+        )
+
+
+@override_settings(METRICS_TOKEN='secret', METRICS_DIR=None)
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='roman')
+        Post.objects.create(text='Пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+
+    def scrape(self):
+        response = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertEqual(response.status_code, 200)
+        return {
+            line.rsplit(' ', 1)[0]: float(line.rsplit(' ', 1)[1])
+            for line in response.content.decode().splitlines()
+            if not line.startswith('#')
+        }
+
+    def test_requires_token_or_staff(self):
+        """Метрики доступны только по токену или сотруднику."""
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong'
+        ).status_code, 403)
+        self.assertIn('text/plain', self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret'
+        )['Content-Type'])
+
+    def test_view_metrics(self):
+        """Запросы попадают в метрики своего представления."""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        samples = self.scrape()
+        view = '{view="posts:index"}'
+        self.assertEqual(
+            samples[f'yatube_request_duration_seconds_count{view}'], 2
+        )
+        self.assertEqual(samples[
+            'yatube_request_duration_seconds_bucket'
+            '{view="posts:index",le="+Inf"}'
+        ], 2)
+        self.assertEqual(samples[
+            'yatube_responses_total{view="posts:index",status="200"}'
+        ], 2)
+        for name in ('db_queries_total', 'template_render_seconds_total',
+                     'response_bytes_total'):
+            with self.subTest(name=name):
+                self.assertGreater(samples[f'yatube_{name}{view}'], 0)
+        self.assertIn('yatube_tasks{status="queued"}', samples)
+
+    def test_processes_share_directory(self):
+        """Счетчики процессов складываются через общий каталог."""
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(METRICS_DIR=directory):
+            with open(os.path.join(directory, '1.json'), 'w') as file:
+                json.dump({
+                    'request_duration\tposts:index\t0.005': 3,
+                    'responses\tposts:index\t200': 3,
+                }, file)
+            self.client.get(reverse('posts:index'))
+            samples = self.scrape()
+        self.assertEqual(samples[
+            'yatube_responses_total{view="posts:index",status="200"}'
+        ], 4)
@@ -0,0 +1,56 @@
+"""Thumbnails of post images, generated before anyone renders them.
+
+Every size the templates show is made by posts.tasks.make_thumbnails right
+after upload and stored on the post as {size: [url, width, height]}.
+Rendering reads only that column: a feed page never opens an image, stats
+the storage or asks sorl's key-value store. Until the task has run the
+original image is shown in the box of the size, with dimensions computed
+from image_width and image_height.
+"""
+import json
+
+from sorl.thumbnail import get_thumbnail
+
+THUMBNAIL_SIZES = {
+    'feed': ('960x339', {'crop': 'center', 'upscale': True}),
+    'detail': ('960', {'upscale': False}),
+}
+
+
+def generate(image):
+    """Make every size of `image`, as stored in Post.thumbnails."""
+    thumbnails = {}
+    for size, (geometry, options) in THUMBNAIL_SIZES.items():
+        thumbnail = get_thumbnail(image, geometry, **options)
+        thumbnails[size] = [thumbnail.url, thumbnail.width, thumbnail.height]
+    return thumbnails
+
+
+def fitted_size(width, height, size):
+    """Dimensions sorl gives a `width` x `height` image at `size`."""
+    geometry, options = THUMBNAIL_SIZES[size]
+    box_width, _, box_height = geometry.partition('x')
+    box = (int(box_width), int(box_height) if box_height else None)
+    if options.get('crop'):
+        return box
+    ratio = min(
+        limit / side for limit, side in zip(box, (width, height)) if limit
+    )
+    if not options.get('upscale', True):
+        ratio = min(ratio, 1)
+    return max(round(width * ratio), 1), max(round(height * ratio), 1)
+
+
+def thumbnail(post, size):
+    """(url, width, height) of the image of `post` at `size`, or None."""
+    if not post.image:
+        return None
+    if post.thumbnails:
+        stored = json.loads(post.thumbnails).get(size)
+        if stored:
+            return tuple(stored)
+    if not (post.image_width and post.image_height):
+        return None
+    return (post.image.url, *fitted_size(
+        post.image_width, post.image_height, size
+    ))
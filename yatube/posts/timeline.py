@@ -0,0 +1,154 @@
+"""Materialized global timeline for the index page.
+
+A TimelineRing row holds the ids of the newest TIMELINE_SIZE posts,
+newest first, together with the total number of posts. Index pages
+inside that window, numbered or keyset ones, are served by primary-key
+lookups instead of sorting the post table.
+
+The row is patched inside the transaction of the post that changes it,
+under the row lock taken by the UPDATE, so concurrent writers in any
+number of processes queue up instead of overwriting each other, and a
+rolled back post rolls back its patch too.
+"""
+import json
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+
+from .models import Post, TimelineRing
+from .paginators import CursorPage, CursorPaginator
+
+RING_PK = 1
+TIMELINE_SIZE = 1000  # ids kept in the ring, a multiple of the page size
+
+
+class Timeline:
+    """Sequence of the whole feed for Paginator, backed by the ring."""
+
+    def __init__(self, ids, count):
+        self.ids = ids
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def covers(self, stop):
+        """Whether the ring holds every post of the feed before `stop`."""
+        return stop <= len(self.ids) or len(self.ids) >= self.count
+
+    def posts(self, ids):
+        posts = Post.objects.feed().in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+    def __getitem__(self, index):
+        start, stop = index.start or 0, index.stop
+        if stop is not None and self.covers(stop):
+            return self.posts(self.ids[start:stop])
+        return list(Post.objects.feed()[index])
+
+
+class TimelinePaginator(CursorPaginator):
+    """Keyset pages of the index, read from the ring while inside it.
+
+    A cursor is looked up among the ring ids; pages of posts the ring
+    does not hold fall back to the index seeks of CursorPaginator.
+    """
+
+    def __init__(self, timeline, per_page):
+        super().__init__(Post.objects.feed(), per_page)
+        self.timeline = timeline
+
+    def position(self, token):
+        """Index of the cursor post in the ring, or None."""
+        cursor = self.decode(token)
+        if cursor is None:
+            return None
+        try:
+            return self.timeline.ids.index(cursor[1])
+        except ValueError:
+            return None
+
+    def cursor_page(self, after=None, before=None):
+        ids = self.timeline.ids
+        if before:
+            stop = self.position(before)
+            if stop is None:
+                return super().cursor_page(after, before)
+            start = max(stop - self.per_page, 0)
+            rows = self.timeline.posts(ids[start:stop])
+            return CursorPage(rows, self, bool(rows), start > 0)
+        start = 0
+        if after:
+            start = self.position(after)
+            if start is None:
+                return super().cursor_page(after, before)
+            start += 1
+        stop = start + self.per_page + 1
+        if not self.timeline.covers(stop):
+            return super().cursor_page(after, before)
+        rows = self.timeline.posts(ids[start:stop])
+        return CursorPage(
+            rows[:self.per_page], self, len(rows) > self.per_page,
+            start > 0
+        )
+
+
+def rebuild():
+    """Read the newest posts from the database and store the ring.
+
+    Always uses the primary: a ring built from a lagging replica would
+    miss posts that push() has already been called for. The row is
+    locked before the posts are read, so a concurrent push() either
+    waits for the rebuild or is already visible to it.
+    """
+    rings = TimelineRing.objects.db_manager(DEFAULT_DB_ALIAS)
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        if not rings.filter(pk=RING_PK).update(ids=''):
+            rings.get_or_create(pk=RING_PK)
+        posts = Post.objects.db_manager(DEFAULT_DB_ALIAS)
+        ids = list(posts.values_list('pk', flat=True)[:TIMELINE_SIZE])
+        count = posts.count()
+        rings.filter(pk=RING_PK).update(
+            ids=json.dumps(ids), posts_count=count
+        )
+    return Timeline(ids, count)
+
+
+def get_timeline():
+    rings = TimelineRing.objects.filter(pk=RING_PK).exclude(ids='')
+    for ids, count in rings.values_list('ids', 'posts_count'):
+        return Timeline(json.loads(ids), count)
+    return rebuild()
+
+
+def reset():
+    """Drop the ring; the next get_timeline() rebuilds it."""
+    TimelineRing.objects.db_manager(DEFAULT_DB_ALIAS).filter(
+        pk=RING_PK
+    ).update(ids='')
+
+
+def _patch(delta, change):
+    """Apply `change` to the ids of a built ring, counting `delta` posts.
+
+    Runs in the transaction of the post, which holds the row lock (or,
+    on SQLite, the database write lock) until it ends.
+    """
+    built = TimelineRing.objects.db_manager(DEFAULT_DB_ALIAS).filter(
+        pk=RING_PK
+    ).exclude(ids='')
+    for ids in built.select_for_update().values_list('ids', flat=True):
+        built.update(
+            ids=json.dumps(change(json.loads(ids))),
+            posts_count=F('posts_count') + delta
+        )
+
+
+def push(post):
+    """Put a freshly created post on top of the ring."""
+    _patch(1, lambda ids: [post.pk] + ids[:TIMELINE_SIZE - 1])
+
+
+def remove(post_pk):
+    """Drop a deleted post from the ring."""
+    _patch(-1, lambda ids: [pk for pk in ids if pk != post_pk])
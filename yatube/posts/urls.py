@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, feeds, views
 
 app_name = 'posts'
 urlpatterns = [
@@ -7,6 +7,27 @@ urlpatterns = [
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('rss/', feeds.latest_rss, name='index_rss'),
+    path('atom/', feeds.latest_atom, name='index_atom'),
+    path('group/<slug:slug>/rss/', feeds.group_rss, name='group_rss'),
+    path('group/<slug:slug>/atom/', feeds.group_atom, name='group_atom'),
+    path('profile/<str:username>/rss/', feeds.author_rss, name='author_rss'),
+    path(
+        'profile/<str:username>/atom/', feeds.author_atom,
+        name='author_atom'
+    ),
+    path('search/', views.search, name='search'),
+    path('export/posts.jsonl', views.export_posts, name='export_posts'),
+    path('api/posts/', api.post_list, name='api_post_list'),
+    path('api/posts/<int:post_id>/', api.post_detail, name='api_post_detail'),
+    path(
+        'api/groups/<slug:slug>/posts/', api.group_posts,
+        name='api_group_posts'
+    ),
+    path(
+        'api/authors/<str:username>/posts/', api.author_posts,
+        name='api_author_posts'
+    ),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
 ]
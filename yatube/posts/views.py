@@ -1,77 +1,210 @@
-from django.core.paginator import Paginator
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.paginator import InvalidPage
+from django.http import (
+    Http404, HttpResponseBadRequest, StreamingHttpResponse
+)
 from django.shortcuts import render, get_object_or_404, redirect
-from .models import Post, Group, User
+from .models import AuthorStat, Post
 from django.contrib.auth.decorators import login_required
+from core.page_cache import (
+    add_cache_tags, anonymous_page_cache, conditional_page
+)
+from .export import export_chunks, gzip_stream, parse_since
 from .forms import PostForm
+from .paginators import CountedPaginator, CursorPaginator, PAGE_NUMBER_LIMIT
+from .scopes import author_scope, group_scope, index_scope, post_scope
+from .search import SearchPaginator
+from .timeline import TimelinePaginator, get_timeline
 
 P_COUNT = 10  # post count on page
 
 
-def paginator_func(request, posts):
-    paginator = Paginator(posts, P_COUNT)
+def paginator_func(request, posts, count, window=None):
+    """Page-number pages for small feeds, keyset pages for big ones.
+
+    `count` is the already known size of the feed, so the paginator never
+    runs its own COUNT(*). `window` is an optional Timeline to read the
+    pages inside its ring from instead of `posts`.
+    """
+    if window is None:
+        cursor_paginator = CursorPaginator(posts, P_COUNT)
+    else:
+        cursor_paginator = TimelinePaginator(window, P_COUNT)
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    if after or before:
+        return cursor_paginator.cursor_page(after, before)
+    source = posts if window is None else window
+    paginator = CountedPaginator(source, P_COUNT, count)
     page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    if paginator.num_pages <= PAGE_NUMBER_LIMIT:
+        return paginator.get_page(page_number)
+    if page_number is None:
+        return cursor_paginator.cursor_page()
+    # Numbered pages of a big feed stop at the limit so OFFSET stays
+    # bounded; deeper posts are reached by cursor only.
+    paginator = CountedPaginator(source, P_COUNT, PAGE_NUMBER_LIMIT * P_COUNT)
+    try:
+        return paginator.page(page_number)
+    except InvalidPage:
+        raise Http404('Такой страницы нет')
+
+
+def tag_page(request, posts, *tags):
+    """Tag the cached page with the posts, authors and groups it shows."""
+    for post in posts:
+        tags += (f'post:{post.pk}', f'author:{post.author_id}')
+        if post.group_id is not None:
+            tags += (f'group:{post.group_id}',)
+    add_cache_tags(request, *tags)
 
 
+@conditional_page(index_scope)
+@anonymous_page_cache
 def index(request):
     """Main page."""
     template = 'posts/index.html'
-    posts = Post.objects.select_related('author', 'group')
-    count = Post.objects.all().count
+    posts = Post.objects.feed()
+    timeline = get_timeline()
+    count = timeline.count
+    page_obj = paginator_func(request, posts, count, timeline)
+    tag_page(request, page_obj, 'feed')
     context = {
-        'page_obj': paginator_func(request, posts),
+        'page_obj': page_obj,
         'count': count
     }
     return render(request, template, context)
 
 
+@conditional_page(group_scope)
+@anonymous_page_cache
 def group_posts(request, slug):
     """Group posts page."""
     template = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=slug)
-    count = group.posts.all().count()
-    posts = group.posts.all()
+    group = request.scope_owner
+    count = group.posts_count
+    posts = group.posts.feed()
+    page_obj = paginator_func(request, posts, count)
+    tag_page(
+        request, page_obj, f'group-feed:{group.pk}', f'group:{group.pk}'
+    )
     context = {
         'group': group,
-        'page_obj': paginator_func(request, posts),
+        'page_obj': page_obj,
         'count': count,
     }
     return render(request, template, context)
 
 
+@conditional_page(author_scope)
+@anonymous_page_cache
 def profile(request, username):
     """Private user page."""
     template = 'posts/profile.html'
-    author = get_object_or_404(User, username=username)
-    count = author.posts.all().count
-    posts = author.posts.all()
+    author = request.scope_owner
+    count = AuthorStat.count_for(author)
+    posts = author.posts.feed()
+    page_obj = paginator_func(request, posts, count)
+    tag_page(
+        request, page_obj, f'author-feed:{author.pk}', f'author:{author.pk}'
+    )
     context = {
         'author': author,
         'count': count,
-        'page_obj': paginator_func(request, posts)
+        'page_obj': page_obj
     }
     return render(request, template, context)
 
 
+def neighbours(posts, post):
+    """Ids of the posts published right before and after `post`.
+
+    Both are LIMIT 1 seeks on the feed index of `posts`.
+    """
+    paginator = CursorPaginator(posts, 1)
+    position = (post.pub_date, post.pk)
+    return {
+        'older': paginator.seek(position).values_list(
+            'pk', flat=True
+        ).first(),
+        'newer': paginator.seek(position, newer=True).values_list(
+            'pk', flat=True
+        ).first(),
+    }
+
+
+@conditional_page(post_scope)
+@anonymous_page_cache
 def post_detail(request, post_id):
     """Post`s description and info."""
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
-    count = post.author.posts.all().count
+    post = request.scope_owner
     author = post.author
+    try:
+        count = author.post_stat.posts_count
+    except AuthorStat.DoesNotExist:
+        count = 0
+    tags = [f'author-feed:{author.pk}']
+    if post.group_id:
+        tags.append(f'group-feed:{post.group_id}')
+    tag_page(request, [post], *tags)
     context = {
         'count': count,
         'author': author,
         'post': post,
+        'author_neighbours': neighbours(
+            Post.objects.filter(author_id=author.pk), post
+        ),
+        'group_neighbours': neighbours(
+            Post.objects.filter(group_id=post.group_id), post
+        ) if post.group_id else None,
     }
     return render(request, template, context)
 
 
+def search(request):
+    """Full-text search page."""
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        page_obj = SearchPaginator(query, P_COUNT).cursor_page(
+            request.GET.get('after'), request.GET.get('before')
+        )
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, template, context)
+
+
+@staff_member_required
+def export_posts(request):
+    """Streaming JSONL dump of all posts for staff."""
+    since = None
+    if request.GET.get('since'):
+        try:
+            since = parse_since(request.GET['since'])
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error))
+    chunks = (data for data, position in export_chunks(since))
+    compress = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+    response = StreamingHttpResponse(
+        gzip_stream(chunks) if compress else chunks,
+        content_type='application/x-ndjson; charset=utf-8'
+    )
+    if compress:
+        response['Content-Encoding'] = 'gzip'
+    response['Vary'] = 'Accept-Encoding'
+    response['Content-Disposition'] = 'attachment; filename="posts.jsonl"'
+    return response
+
+
 @login_required
 def post_create(request):
     """This page create a new post."""
     template = 'posts/create_post.html'
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         obj = form.save(commit=False)
         obj.author = request.user
@@ -88,7 +221,7 @@ def post_edit(request, post_id):
     """This page edit a page."""
     template = 'posts/create_post.html'
     post = get_object_or_404(Post, pk=post_id)
-    if post.author != request.user:
+    if post.author_id != request.user.pk:
         return redirect(
             'posts:post_detail', post_id
         )
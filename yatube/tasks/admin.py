@@ -0,0 +1,54 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import OutboxEmail, Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('pk',
+                    'name',
+                    'status',
+                    'attempts',
+                    'run_at',
+                    'created',
+                    'finished')
+    list_filter = ('status', 'name')
+    search_fields = ('key',)
+    readonly_fields = ('created', 'finished', 'locked_by', 'locked_until')
+    actions = ('requeue',)
+    empty_value_display = '-пусто-'
+
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status=Task.RUNNING).update(
+            status=Task.QUEUED, attempts=0, run_at=timezone.now(),
+            finished=None
+        )
+        self.message_user(request, f'Возвращено в очередь: {updated}.')
+    requeue.short_description = 'Вернуть в очередь'
+
+
+admin.site.register(Task, TaskAdmin)
+
+
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('pk',
+                    'recipients',
+                    'status',
+                    'attempts',
+                    'created',
+                    'sent')
+    list_filter = ('status',)
+    search_fields = ('recipients',)
+    readonly_fields = ('message', 'created', 'sent', 'locked_until')
+    actions = ('requeue',)
+    empty_value_display = '-пусто-'
+
+    def requeue(self, request, queryset):
+        updated = queryset.filter(status=OutboxEmail.DEAD).update(
+            status=OutboxEmail.QUEUED, attempts=0, send_at=timezone.now()
+        )
+        self.message_user(request, f'Возвращено в очередь: {updated}.')
+    requeue.short_description = 'Вернуть в очередь'
+
+
+admin.site.register(OutboxEmail, OutboxEmailAdmin)
@@ -0,0 +1,72 @@
+import os
+import socket
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from tasks.queue import claim, reap, run
+
+
+class Command(BaseCommand):
+    help = 'Запускает пул потоков, выполняющих фоновые задачи из базы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=2)
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза в секундах, когда задач нет.'
+        )
+        parser.add_argument(
+            '--lease', type=int, default=300,
+            help='Через сколько секунд задача упавшего обработчика '
+                 'вернется в очередь.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить все готовые задачи и выйти.'
+        )
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        self.options = options
+        self.processed = {True: 0, False: 0}
+        self.lock = threading.Lock()
+        reap()
+        prefix = f'{socket.gethostname()}:{os.getpid()}'
+        threads = [
+            threading.Thread(target=self.work, args=(f'{prefix}:{number}',))
+            for number in range(options['threads'])
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                time.sleep(options['poll_interval'])
+                if not options['once']:
+                    reap()
+                    close_old_connections()
+        except KeyboardInterrupt:
+            self.stop.set()
+        for thread in threads:
+            thread.join()
+        self.stdout.write(
+            f'Выполнено задач: {self.processed[True]}, '
+            f'с ошибкой: {self.processed[False]}.'
+        )
+
+    def work(self, worker):
+        try:
+            while not self.stop.is_set():
+                claimed = claim(worker, self.options['lease'])
+                if claimed is None:
+                    if self.options['once']:
+                        return
+                    self.stop.wait(self.options['poll_interval'])
+                    continue
+                succeeded = run(claimed)
+                with self.lock:
+                    self.processed[succeeded] += 1
+        finally:
+            connections.close_all()
@@ -0,0 +1,58 @@
+import json
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks.outbox import dispatch, outbox_stats, release_expired
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = ('Отправляет письма из исходящей очереди пачками через одно '
+            'соединение OUTBOX_DELIVERY_BACKEND.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument(
+            '--rate', type=float, help='Не больше писем в секунду.'
+        )
+        parser.add_argument('--poll-interval', type=float, default=5.0)
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Отправить все готовые письма и выйти.'
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Вывести глубину очереди и задержку доставки и выйти.'
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(outbox_stats(), indent=2))
+            return
+        try:
+            while True:
+                try:
+                    release_expired()
+                    sent, failed = dispatch(
+                        options['batch_size'], options['rate']
+                    )
+                except Exception:
+                    # Keep polling: leases and backoff recover the rows.
+                    if options['once']:
+                        raise
+                    logger.exception('Outbox dispatch failed')
+                    time.sleep(options['poll_interval'])
+                    continue
+                if sent or failed:
+                    self.stdout.write(
+                        f'Отправлено: {sent}, с ошибкой: {failed}.'
+                    )
+                    continue
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
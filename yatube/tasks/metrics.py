@@ -0,0 +1,28 @@
+"""Queue gauges for core.metrics, see METRICS_COLLECTORS."""
+from django.db.models import Count
+
+from .models import Task
+from .outbox import outbox_stats
+
+
+def queue_gauges():
+    tasks = dict(
+        Task.objects.values_list('status').annotate(Count('pk')).order_by()
+    )
+    outbox = outbox_stats()
+    return [
+        ('yatube_tasks', 'gauge', 'Background tasks by status.', [
+            ({'status': status}, tasks.get(status, 0))
+            for status, _ in Task.STATUSES
+        ]),
+        ('yatube_outbox_emails', 'gauge', 'Outbox emails by state.', [
+            ({'status': 'queued'}, outbox['queued']),
+            ({'status': 'dead'}, outbox['dead']),
+        ]),
+        ('yatube_outbox_oldest_queued_seconds', 'gauge',
+         'Age of the oldest email waiting in the outbox.',
+         [({}, outbox['oldest_queued_age'])]),
+        ('yatube_outbox_latency_p95_seconds', 'gauge',
+         'Delivery latency of the emails sent in the last hour.',
+         [({}, outbox['latency_p95'])]),
+    ]
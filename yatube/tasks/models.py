@@ -0,0 +1,139 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    DEAD = 'dead'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (DEAD, 'Отложена после ошибок'),
+    )
+
+    name = models.CharField(
+        max_length=200,
+        verbose_name='Задача'
+    )
+    kwargs = models.TextField(
+        default='{}',
+        verbose_name='Аргументы (JSON)'
+    )
+    key = models.CharField(
+        max_length=200, unique=True, null=True, blank=True,
+        verbose_name='Ключ идемпотентности'
+    )
+    status = models.CharField(
+        max_length=10, choices=STATUSES, default=QUEUED,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попытки'
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        default=5,
+        verbose_name='Максимум попыток'
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Запустить после'
+    )
+    locked_by = models.CharField(
+        max_length=100, blank=True,
+        verbose_name='Обработчик'
+    )
+    locked_until = models.DateTimeField(
+        null=True, blank=True,
+        verbose_name='Занята до'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создана'
+    )
+    finished = models.DateTimeField(
+        null=True, blank=True,
+        verbose_name='Завершена'
+    )
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
+
+    class Meta:
+        ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['status', 'run_at'], name='task_queue_idx'
+            ),
+        ]
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+
+
+class OutboxEmail(models.Model):
+    QUEUED = 'queued'
+    SENDING = 'sending'
+    SENT = 'sent'
+    DEAD = 'dead'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (SENDING, 'Отправляется'),
+        (SENT, 'Отправлено'),
+        (DEAD, 'Не доставлено'),
+    )
+
+    message = models.TextField(
+        verbose_name='Письмо (JSON)'
+    )
+    recipients = models.TextField(
+        verbose_name='Получатели'
+    )
+    status = models.CharField(
+        max_length=10, choices=STATUSES, default=QUEUED,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попытки'
+    )
+    send_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Отправить после'
+    )
+    locked_until = models.DateTimeField(
+        null=True, blank=True,
+        verbose_name='Занято до'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создано'
+    )
+    sent = models.DateTimeField(
+        null=True, blank=True,
+        verbose_name='Отправлено'
+    )
+
+    def __str__(self):
+        return f'{self.recipients} #{self.pk}'
+
+    class Meta:
+        ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['status', 'send_at'], name='outbox_queue_idx'
+            ),
+            models.Index(fields=['sent'], name='outbox_sent_idx'),
+        ]
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
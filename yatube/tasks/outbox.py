@@ -0,0 +1,222 @@
+"""Email outbox: OutboxBackend stores messages, dispatch() delivers them.
+
+Views that send mail (password reset and the like) only pay for an
+INSERT. manage.py send_outbox then delivers queued messages in batches
+over one connection of OUTBOX_DELIVERY_BACKEND, at no more than
+OUTBOX_RATE messages per second, retrying failures with the backoff of
+the task queue. TASKS_ALWAYS_EAGER does not apply here: only
+OUTBOX_ALWAYS_EAGER, meant for tests, delivers mail inside the request.
+"""
+import base64
+import json
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db.models import F, Min
+from django.utils import timezone
+
+from .models import OutboxEmail
+from .queue import backoff
+
+logger = logging.getLogger(__name__)
+
+
+def serialize(message):
+    """JSON for an EmailMessage; file attachments are stored inline."""
+    attachments = []
+    for attachment in message.attachments:
+        if not isinstance(attachment, tuple):
+            raise ValueError('MIME attachments are not supported.')
+        filename, content, mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode()
+        attachments.append(
+            (filename, base64.b64encode(content).decode(), mimetype)
+        )
+    return json.dumps({
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+        'content_subtype': message.content_subtype,
+        'attachments': attachments,
+    })
+
+
+def deserialize(data, connection=None):
+    data = json.loads(data)
+    message = EmailMultiAlternatives(
+        subject=data['subject'],
+        body=data['body'],
+        from_email=data['from_email'],
+        to=data['to'],
+        cc=data['cc'],
+        bcc=data['bcc'],
+        reply_to=data['reply_to'],
+        headers=data['headers'],
+        alternatives=[tuple(item) for item in data['alternatives']],
+        connection=connection,
+    )
+    message.content_subtype = data['content_subtype']
+    for filename, content, mimetype in data['attachments']:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+class OutboxBackend(BaseEmailBackend):
+    """Persist messages for send_outbox instead of sending them."""
+
+    def send_messages(self, email_messages):
+        rows = []
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            try:
+                rows.append(OutboxEmail(
+                    message=serialize(message),
+                    recipients=', '.join(message.recipients()),
+                ))
+            except ValueError:
+                if not self.fail_silently:
+                    raise
+        OutboxEmail.objects.bulk_create(rows)
+        if rows and getattr(settings, 'OUTBOX_ALWAYS_EAGER', False):
+            dispatch()
+        return len(rows)
+
+
+def claim(limit, lease):
+    now = timezone.now()
+    due = OutboxEmail.objects.filter(
+        status=OutboxEmail.QUEUED, send_at__lte=now
+    ).order_by('send_at', 'pk').values_list('pk', flat=True)[:limit]
+    claimed = [
+        pk for pk in due
+        # Another dispatcher may have claimed it since the SELECT.
+        if OutboxEmail.objects.filter(
+            pk=pk, status=OutboxEmail.QUEUED
+        ).update(
+            status=OutboxEmail.SENDING,
+            locked_until=now + timedelta(seconds=lease),
+            attempts=F('attempts') + 1,
+        )
+    ]
+    return list(OutboxEmail.objects.filter(pk__in=claimed).order_by('pk'))
+
+
+def fail(row, error, max_attempts):
+    """Retry a claimed message with backoff, or give up on it."""
+    delivered = OutboxEmail.objects.filter(
+        pk=row.pk, status=OutboxEmail.SENDING
+    )
+    if row.attempts >= max_attempts:
+        delivered.update(status=OutboxEmail.DEAD, last_error=error)
+    else:
+        delivered.update(
+            status=OutboxEmail.QUEUED,
+            last_error=error,
+            send_at=timezone.now() + timedelta(
+                seconds=backoff(row.attempts)
+            ),
+        )
+
+
+def dispatch(batch_size=None, rate=None, lease=300):
+    """Deliver one batch of due messages, returns (sent, failed)."""
+    batch_size = batch_size or getattr(settings, 'OUTBOX_BATCH_SIZE', 100)
+    rate = rate or getattr(settings, 'OUTBOX_RATE', 10)
+    max_attempts = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5)
+    rows = claim(batch_size, lease)
+    if not rows:
+        return 0, 0
+    sent = failed = 0
+    connection = get_connection(settings.OUTBOX_DELIVERY_BACKEND)
+    try:
+        connection.open()
+    except Exception:
+        # The relay is down: the whole batch is retried later.
+        logger.warning('Outbox connection failed', exc_info=True)
+        error = traceback.format_exc()
+        for row in rows:
+            fail(row, error, max_attempts)
+        return 0, len(rows)
+    interval = 1 / rate
+    try:
+        for row in rows:
+            started = time.monotonic()
+            try:
+                connection.send_messages(
+                    [deserialize(row.message, connection)]
+                )
+            except Exception:
+                logger.warning('Outbox email %s failed', row, exc_info=True)
+                failed += 1
+                fail(row, traceback.format_exc(), max_attempts)
+            else:
+                sent += 1
+                OutboxEmail.objects.filter(
+                    pk=row.pk, status=OutboxEmail.SENDING
+                ).update(status=OutboxEmail.SENT, sent=timezone.now())
+            pause = interval - (time.monotonic() - started)
+            if pause > 0:
+                time.sleep(pause)
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            logger.warning('Outbox connection close failed', exc_info=True)
+    return sent, failed
+
+
+def release_expired():
+    """Requeue messages of a dispatcher that died mid-batch.
+
+    Messages out of attempts are moved to 'dead', like tasks in reap().
+    """
+    now = timezone.now()
+    expired = OutboxEmail.objects.filter(
+        status=OutboxEmail.SENDING, locked_until__lt=now
+    )
+    expired.filter(
+        attempts__gte=getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5)
+    ).update(status=OutboxEmail.DEAD, last_error='Истекла блокировка')
+    expired.update(status=OutboxEmail.QUEUED)
+
+
+def outbox_stats(window=60 * 60):
+    """Queue depth and delivery latency over the last `window` seconds."""
+    now = timezone.now()
+    pending = OutboxEmail.objects.filter(
+        status__in=(OutboxEmail.QUEUED, OutboxEmail.SENDING)
+    )
+    oldest = pending.aggregate(oldest=Min('created'))['oldest']
+    latencies = sorted(
+        (sent - created).total_seconds()
+        for created, sent in OutboxEmail.objects.filter(
+            sent__gte=now - timedelta(seconds=window)
+        ).values_list('created', 'sent')
+    )
+    return {
+        'queued': pending.count(),
+        'dead': OutboxEmail.objects.filter(status=OutboxEmail.DEAD).count(),
+        'oldest_queued_age': (
+            (now - oldest).total_seconds() if oldest else 0
+        ),
+        'sent': len(latencies),
+        'latency_avg': (
+            sum(latencies) / len(latencies) if latencies else 0
+        ),
+        'latency_p95': (
+            latencies[int(len(latencies) * 0.95)] if latencies else 0
+        ),
+    }
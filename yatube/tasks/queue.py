@@ -0,0 +1,138 @@
+"""Durable background tasks stored in the database.
+
+A task is a registered function and JSON keyword arguments. enqueue()
+costs the caller a single INSERT, inside its own transaction, so the task
+becomes visible to workers exactly when the change that caused it
+commits. Workers started by manage.py run_workers claim due tasks with a
+conditional UPDATE, retry failures with exponential backoff and move
+tasks that keep failing to the 'dead' status for inspection in the admin.
+
+With TASKS_ALWAYS_EAGER tasks run inline at enqueue time, which is what
+the development settings and the test suite use.
+"""
+import json
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+
+
+def task(function):
+    """Register `function` so workers can find it by its dotted name."""
+    function.task_name = f'{function.__module__}.{function.__qualname__}'
+    REGISTRY[function.task_name] = function
+    return function
+
+
+def enqueue(function, key=None, delay=0, max_attempts=None, **kwargs):
+    """Schedule a registered task, once per idempotency `key`.
+
+    Returns the Task, None when eager or when `key` is already taken.
+    """
+    if getattr(settings, 'TASKS_ALWAYS_EAGER', False):
+        function(**kwargs)
+        return None
+    new = Task(
+        name=function.task_name,
+        kwargs=json.dumps(kwargs),
+        key=key,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or getattr(
+            settings, 'TASKS_MAX_ATTEMPTS', 5
+        ),
+    )
+    if key is None:
+        new.save()
+        return new
+    try:
+        with transaction.atomic():
+            new.save()
+    except IntegrityError:
+        return None
+    return new
+
+
+def backoff(attempts):
+    """Seconds to wait before retrying after `attempts` failures."""
+    base = getattr(settings, 'TASKS_RETRY_DELAY', 5)
+    ceiling = getattr(settings, 'TASKS_RETRY_MAX_DELAY', 60 * 60)
+    delay = min(base * 2 ** (attempts - 1), ceiling)
+    return delay + random.uniform(0, delay / 10)
+
+
+def claim(worker, lease, limit=10):
+    """Lock the next due task for `worker`, or return None."""
+    now = timezone.now()
+    due = Task.objects.filter(
+        status=Task.QUEUED, run_at__lte=now
+    ).order_by('run_at', 'pk').values_list('pk', flat=True)[:limit]
+    for pk in due:
+        # Another worker may have claimed it since the SELECT.
+        claimed = Task.objects.filter(pk=pk, status=Task.QUEUED).update(
+            status=Task.RUNNING,
+            locked_by=worker,
+            locked_until=now + timedelta(seconds=lease),
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def run(claimed):
+    """Execute a claimed task and record the outcome."""
+    running = Task.objects.filter(
+        pk=claimed.pk, status=Task.RUNNING, locked_by=claimed.locked_by
+    )
+    function = REGISTRY.get(claimed.name)
+    if function is None:
+        running.update(
+            status=Task.DEAD, finished=timezone.now(),
+            last_error=f'Неизвестная задача {claimed.name}'
+        )
+        return False
+    try:
+        with transaction.atomic():
+            function(**json.loads(claimed.kwargs))
+            running.update(status=Task.DONE, finished=timezone.now())
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Task %s failed', claimed, exc_info=True)
+        if claimed.attempts >= claimed.max_attempts:
+            running.update(
+                status=Task.DEAD, finished=timezone.now(), last_error=error
+            )
+        else:
+            running.update(
+                status=Task.QUEUED, last_error=error,
+                run_at=timezone.now() + timedelta(
+                    seconds=backoff(claimed.attempts)
+                ),
+            )
+        return False
+    return True
+
+
+def reap():
+    """Release tasks whose worker died and forget old finished ones."""
+    now = timezone.now()
+    expired = Task.objects.filter(status=Task.RUNNING, locked_until__lt=now)
+    expired.filter(attempts__gte=F('max_attempts')).update(
+        status=Task.DEAD, finished=now, last_error='Истекла блокировка'
+    )
+    expired.update(status=Task.QUEUED, run_at=now)
+    keep = getattr(settings, 'TASKS_KEEP_DONE', 60 * 60 * 24)
+    Task.objects.filter(
+        status=Task.DONE, finished__lt=now - timedelta(seconds=keep)
+    ).delete()
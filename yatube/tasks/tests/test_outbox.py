@@ -0,0 +1,160 @@
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import OutboxEmail
+from ..outbox import dispatch, outbox_stats, release_expired
+
+User = get_user_model()
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise SMTPException('Relay is down')
+
+
+class UnreachableBackend(BaseEmailBackend):
+    def open(self):
+        raise ConnectionRefusedError('Connection refused')
+
+    def send_messages(self, email_messages):
+        raise AssertionError('Not connected')
+
+
+@override_settings(
+    EMAIL_BACKEND='tasks.outbox.OutboxBackend',
+    OUTBOX_DELIVERY_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    OUTBOX_RATE=1000,
+    TASKS_ALWAYS_EAGER=False,
+)
+class OutboxTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='roman', email='roman@example.com', password='pass'
+        )
+
+    def test_password_reset_goes_through_outbox(self):
+        """Сброс пароля кладет письмо в очередь, отправка — позже."""
+        self.client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'roman@example.com'}
+        )
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(outbox_stats()['queued'], 1)
+        self.assertEqual(dispatch(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['roman@example.com'])
+        self.assertIn('/auth/reset/', mail.outbox[0].body)
+        stats = outbox_stats()
+        self.assertEqual((stats['queued'], stats['sent']), (0, 1))
+        self.assertEqual(dispatch(), (0, 0))
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_eager_tasks_do_not_send_mail(self):
+        """Письмо ждет send_outbox даже при TASKS_ALWAYS_EAGER."""
+        mail.send_mail('Тема', 'Текст', None, ['roman@example.com'])
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(outbox_stats()['queued'], 1)
+        with self.settings(OUTBOX_ALWAYS_EAGER=True):
+            mail.send_mail('Тема', 'Текст', None, ['roman@example.com'])
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_batch_with_alternatives(self):
+        """Пачка уходит через одно соединение вместе с HTML-версией."""
+        messages = [
+            mail.EmailMultiAlternatives(
+                f'Тема {i}', 'Текст', 'from@example.com', [f'{i}@example.com']
+            )
+            for i in range(3)
+        ]
+        messages[0].attach_alternative('<b>Текст</b>', 'text/html')
+        messages[1].attach('note.txt', 'Вложение', 'text/plain')
+        mail.get_connection().send_messages(messages)
+        self.assertEqual(dispatch(batch_size=2), (2, 0))
+        self.assertEqual(dispatch(batch_size=2), (1, 0))
+        sent = {message.subject: message for message in mail.outbox}
+        self.assertEqual(
+            sent['Тема 0'].alternatives, [('<b>Текст</b>', 'text/html')]
+        )
+        self.assertEqual(sent['Тема 1'].attachments[0][0], 'note.txt')
+
+    @override_settings(
+        OUTBOX_DELIVERY_BACKEND='tasks.tests.test_outbox.FailingBackend',
+        OUTBOX_MAX_ATTEMPTS=2,
+    )
+    def test_retry_then_dead(self):
+        """Неудачная отправка повторяется, затем письмо откладывается."""
+        mail.send_mail('Тема', 'Текст', None, ['roman@example.com'])
+        self.assertEqual(dispatch(), (0, 1))
+        queued = OutboxEmail.objects.get()
+        self.assertEqual(queued.status, OutboxEmail.QUEUED)
+        self.assertGreater(queued.send_at, timezone.now())
+        OutboxEmail.objects.update(send_at=timezone.now())
+        self.assertEqual(dispatch(), (0, 1))
+        dead = OutboxEmail.objects.get()
+        self.assertEqual(dead.status, OutboxEmail.DEAD)
+        self.assertIn('Relay is down', dead.last_error)
+        self.assertEqual(outbox_stats()['dead'], 1)
+
+    @override_settings(
+        OUTBOX_DELIVERY_BACKEND='tasks.tests.test_outbox.UnreachableBackend',
+        OUTBOX_MAX_ATTEMPTS=2,
+    )
+    def test_unreachable_relay_is_retried(self):
+        """Недоступный сервер почты: письма откладываются, затем в dead."""
+        mail.send_mail('Тема', 'Текст', None, ['roman@example.com'])
+        self.assertEqual(dispatch(), (0, 1))
+        queued = OutboxEmail.objects.get()
+        self.assertEqual((queued.status, queued.attempts), (
+            OutboxEmail.QUEUED, 1
+        ))
+        self.assertGreater(queued.send_at, timezone.now())
+        self.assertIn('Connection refused', queued.last_error)
+        OutboxEmail.objects.update(send_at=timezone.now())
+        self.assertEqual(dispatch(), (0, 1))
+        self.assertEqual(OutboxEmail.objects.get().status, OutboxEmail.DEAD)
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    def test_expired_lease(self):
+        """Зависшее письмо возвращается в очередь, пока есть попытки."""
+        mail.send_mail('Тема', 'Текст', None, ['roman@example.com'])
+        past = timezone.now() - timedelta(seconds=1)
+        for attempts, status in ((1, OutboxEmail.QUEUED),
+                                 (2, OutboxEmail.DEAD)):
+            with self.subTest(attempts=attempts):
+                OutboxEmail.objects.update(
+                    status=OutboxEmail.SENDING, attempts=attempts,
+                    locked_until=past
+                )
+                release_expired()
+                self.assertEqual(OutboxEmail.objects.get().status, status)
+
+    def test_send_outbox_survives_errors(self):
+        """send_outbox продолжает работу после ошибки отправки."""
+        with mock.patch(
+                'tasks.management.commands.send_outbox.dispatch',
+                side_effect=[RuntimeError('сбой'), KeyboardInterrupt]
+        ) as dispatch_mock, self.assertLogs(
+                'tasks.management.commands.send_outbox'):
+            call_command('send_outbox', poll_interval=0, stdout=StringIO())
+        self.assertEqual(dispatch_mock.call_count, 2)
+
+    def test_metrics_endpoint_is_staff_only(self):
+        """Метрики очереди доступны только персоналу."""
+        url = reverse('tasks:outbox_metrics')
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.get(url).json()['queued'], 0)
@@ -0,0 +1,103 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from posts.models import Post
+from posts.search import matches
+from ..models import Task
+from ..queue import claim, enqueue, reap, run, task
+
+User = get_user_model()
+
+CALLS = []
+
+
+@task
+def remember(value):
+    CALLS.append(value)
+
+
+@task
+def explode():
+    raise ValueError('Не получилось')
+
+
+@override_settings(TASKS_ALWAYS_EAGER=False)
+class QueueTest(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_enqueue_and_run(self):
+        """Задача выполняется обработчиком и помечается выполненной."""
+        queued = enqueue(remember, value=1)
+        self.assertEqual(CALLS, [])
+        claimed = claim('test', lease=60)
+        self.assertEqual(claimed.pk, queued.pk)
+        self.assertTrue(run(claimed))
+        self.assertEqual(CALLS, [1])
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+        self.assertIsNone(claim('test', lease=60))
+
+    def test_idempotency_key(self):
+        """Повторная постановка с тем же ключом игнорируется."""
+        self.assertIsNotNone(enqueue(remember, key='once', value=1))
+        self.assertIsNone(enqueue(remember, key='once', value=2))
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_retry_and_dead_letter(self):
+        """Упавшая задача повторяется с задержкой, затем откладывается."""
+        enqueue(explode, max_attempts=2)
+        self.assertFalse(run(claim('test', lease=60)))
+        failed = Task.objects.get()
+        self.assertEqual(failed.status, Task.QUEUED)
+        self.assertGreater(failed.run_at, timezone.now())
+        self.assertIn('Не получилось', failed.last_error)
+        self.assertIsNone(claim('test', lease=60))
+        Task.objects.update(run_at=timezone.now())
+        self.assertFalse(run(claim('test', lease=60)))
+        dead = Task.objects.get()
+        self.assertEqual(dead.status, Task.DEAD)
+        self.assertEqual(dead.attempts, 2)
+        Task.objects.create(name='nowhere.task')
+        run(claim('test', lease=60))
+        self.assertEqual(Task.objects.filter(status=Task.DEAD).count(), 2)
+
+    def test_reap_expired_lease(self):
+        """Задача упавшего обработчика возвращается в очередь."""
+        enqueue(remember, value=1)
+        claim('test', lease=60)
+        Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        reap()
+        self.assertEqual(Task.objects.get().status, Task.QUEUED)
+
+    def test_eager(self):
+        """В режиме TASKS_ALWAYS_EAGER задача выполняется сразу."""
+        with self.settings(TASKS_ALWAYS_EAGER=True):
+            self.assertIsNone(enqueue(remember, value=1))
+        self.assertEqual(CALLS, [1])
+        self.assertFalse(Task.objects.exists())
+
+
+@override_settings(TASKS_ALWAYS_EAGER=False)
+class RunWorkersTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_post_indexed_by_workers(self):
+        """Сохранение поста ставит одну задачу, индекс строят обработчики."""
+        user = User.objects.create_user(username='roman')
+        post = Post.objects.create(text='Неторопливая индексация', author=user)
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertFalse(matches('индексация').exists())
+        stdout = StringIO()
+        call_command('run_workers', once=True, threads=2, stdout=stdout)
+        self.assertIn('Выполнено задач: 1', stdout.getvalue())
+        self.assertEqual(
+            list(matches('индексация').values_list('post', flat=True)),
+            [post.pk]
+        )
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+app_name = 'tasks'
+urlpatterns = [
+    path('outbox/metrics/', views.outbox_metrics, name='outbox_metrics'),
+]
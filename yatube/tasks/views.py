@@ -0,0 +1,10 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from .outbox import outbox_stats
+
+
+@staff_member_required
+def outbox_metrics(request):
+    """Outbox queue depth and delivery latency for monitoring."""
+    return JsonResponse(outbox_stats())
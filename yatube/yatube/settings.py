@@ -41,6 +41,8 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'tasks.apps.TasksConfig',
+    'sorl.thumbnail',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -51,10 +53,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.metrics.MetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.db_router.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -64,7 +68,9 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = [os.path.join(BASE_DIR, 'templates')]
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django templates that report render time to core.metrics.
+        'BACKEND': 'core.metrics.DjangoTemplates',
+        'NAME': 'django',
         'DIRS': TEMPLATES_DIR,
         'APP_DIRS': True,
         'OPTIONS': {
@@ -86,13 +92,60 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Applied to every new connection by core.sqlite. WAL lets readers run
+# alongside the single writer; NORMAL sync is durable across app crashes
+# and only risks the last transactions on power loss in WAL mode.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # KiB, i.e. 64 MiB of page cache
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,  # ms to wait for the write lock
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Each worker keeps its connection (and the pragmas above) for up
+        # to this many seconds instead of reconnecting on every request.
+        'CONN_MAX_AGE': 600,
+        'PRAGMAS': SQLITE_PRAGMAS,
     }
 }
 
+# Read replicas, see core.db_router. YATUBE_SQLITE_REPLICAS=N adds N file
+# copies of the primary for local testing; refresh them with
+# python manage.py sync_replicas.
+DATABASE_REPLICAS = []
+for number in range(1, int(os.environ.get('YATUBE_SQLITE_REPLICAS', 0)) + 1):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': os.path.join(BASE_DIR, f'db.replica{number}.sqlite3'),
+        'PRAGMAS': {**SQLITE_PRAGMAS, 'query_only': 'ON'},
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+
+READ_REPLICA_VIEWS = [
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'about:author',
+    'about:tech',
+]
+
+# Seconds a session reads from the primary after a write request.
+READ_YOUR_WRITES_WINDOW = 30
+# Longest a replica may trail the primary. Pages and validators built
+# from a replica are trusted for no longer than this.
+REPLICA_MAX_LAG = 30
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -131,6 +184,17 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/3.2/howto/static-files/
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Thumbnails are generated by the posts.tasks.make_thumbnails task after
+# upload. The key-value store keeps what sorl knows about each image in
+# the cache in front of the database, so regenerating does not stat files.
+THUMBNAIL_KVSTORE = 'sorl.thumbnail.kvstores.cached_db_kvstore.KVStore'
+THUMBNAIL_QUALITY = 85
+THUMBNAIL_PRESERVE_FORMAT = True
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
@@ -141,5 +205,36 @@ LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Mail is stored in the outbox and delivered by manage.py send_outbox
+# through OUTBOX_DELIVERY_BACKEND, see tasks.outbox.
+EMAIL_BACKEND = 'tasks.outbox.OutboxBackend'
+OUTBOX_DELIVERY_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_RATE = 10  # messages per second
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_ALWAYS_EAGER = False  # tests only: deliver inside send_messages()
+
+# Per-view request metrics served at /metrics, see core.metrics. Worker
+# processes share them through files in METRICS_DIR; without it each
+# process reports only its own requests.
+METRICS_DIR = os.environ.get('YATUBE_METRICS_DIR')
+METRICS_FLUSH_INTERVAL = 1  # seconds
+METRICS_TOKEN = os.environ.get('YATUBE_METRICS_TOKEN')
+METRICS_COLLECTORS = ['tasks.metrics.queue_gauges']
+
+# Local memory is private to a process; settings_production shares the
+# cache between worker processes.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Background tasks, see tasks.queue. Development and tests run them inline;
+# production enqueues them for python manage.py run_workers.
+TASKS_ALWAYS_EAGER = True
+TASKS_MAX_ATTEMPTS = 5
+TASKS_RETRY_DELAY = 5  # seconds before the first retry, doubled each time
+TASKS_RETRY_MAX_DELAY = 60 * 60
+TASKS_KEEP_DONE = 60 * 60 * 24  # seconds finished tasks stay in the table
@@ -0,0 +1,76 @@
+"""Production settings, selected with --settings=yatube.settings_production
+or DJANGO_SETTINGS_MODULE=yatube.settings_production for the WSGI server.
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, MIDDLEWARE, TEMPLATES
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', SECRET_KEY)  # noqa: F405
+
+DEBUG = False
+
+ALLOWED_HOSTS = os.environ.get(
+    'DJANGO_ALLOWED_HOSTS', 'localhost 127.0.0.1 [::1]'
+).split()
+
+# Templates are read and compiled once per process and kept in memory.
+# The cached loader cannot be combined with APP_DIRS.
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'context_processors': [
+                processor
+                for processor in TEMPLATES[0]['OPTIONS']['context_processors']
+                if processor != 'django.template.context_processors.debug'
+            ],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
+
+# Compile every project template when the WSGI application starts,
+# see core.warmup.
+WARM_TEMPLATES_ON_BOOT = True
+
+TASKS_ALWAYS_EAGER = False
+
+# Page cache tag versions, ETag scopes and the timeline ring must be seen
+# by every worker process, and by run_workers, so the cache is shared
+# through a directory instead of the per-process local memory. Evicting a
+# tag version only invalidates the pages that depend on it.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'YATUBE_CACHE_DIR', os.path.join(BASE_DIR, 'cache')
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+        },
+    }
+}
+
+# collectstatic writes content-hashed names with gzip and brotli variants,
+# served by the application itself, see core.static. Uploaded images and
+# their thumbnails in MEDIA_ROOT are served the same way; drop
+# MediaFilesMiddleware when a web server serves MEDIA_URL instead.
+STATICFILES_STORAGE = 'core.static.CompressedManifestStaticFilesStorage'
+MIDDLEWARE = [
+    MIDDLEWARE[0],
+    'core.static.StaticFilesMiddleware',
+    'core.static.MediaFilesMiddleware',
+    *MIDDLEWARE[1:],
+]
+
+# Worker processes add up their request metrics through this directory.
+METRICS_DIR = os.environ.get(
+    'YATUBE_METRICS_DIR', os.path.join(BASE_DIR, 'metrics')
+)